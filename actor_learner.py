@@ -0,0 +1,330 @@
+import multiprocessing as mp
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from tetris_subproc_env import _attach
+from tetris_vec_env import TetrisVecEnv
+
+# Seconds the learner waits for a trajectory before checking on the actors.
+ACTOR_CHECK_EVERY = 1.0
+
+
+def vtrace(behaviour_log_probs, log_probs, rewards, values, bootstrap, dones, gamma):
+    """V-trace targets and policy-gradient advantages (Espeholt et al., 2018).
+
+    All inputs are (T, B) tensors except `bootstrap`, the (B,) values of the
+    observations after the last step. Importance weights are truncated at 1
+    for both the targets (rho) and the traces (c).
+    """
+    rhos = torch.exp(log_probs - behaviour_log_probs).clamp(max=1.0)
+    discounts = gamma * (1.0 - dones)
+    next_values = torch.cat([values[1:], bootstrap[None]])
+    deltas = rhos * (rewards + discounts * next_values - values)
+
+    corrections = torch.zeros_like(values)
+    acc = torch.zeros_like(bootstrap)
+    for t in reversed(range(len(values))):
+        acc = deltas[t] + discounts[t] * rhos[t] * acc
+        corrections[t] = acc
+    targets = values + corrections
+
+    next_targets = torch.cat([targets[1:], bootstrap[None]])
+    advantages = rhos * (rewards + discounts * next_targets - values)
+    return targets, advantages
+
+
+def _actor(rank, specs, free, full, stop, version, settings):
+    policy_class, policy_kwargs, num_envs, unroll, env_kwargs, seed = settings
+    torch.set_num_threads(1)
+    blocks, buffers = {}, {}
+    for key, spec in specs.items():
+        blocks[key], buffers[key] = _attach(spec)
+    obs_keys = [key for key in buffers if key.startswith("obs.")]
+
+    env = TetrisVecEnv(num_envs, **env_kwargs)
+    env.seed(seed + rank * num_envs)
+    obs = env.reset()
+    policy = policy_class(
+        env.observation_space, env.action_space, lambda _: 0.0, **policy_kwargs
+    )
+    policy.set_training_mode(False)
+    params = buffers["params"]
+    synced = -1
+
+    try:
+        while not stop.is_set():
+            try:
+                slot = free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # Pick up the learner's newest weights once per unroll.
+            with version.get_lock():
+                if version.value != synced:
+                    synced = version.value
+                    vector_to_parameters(
+                        torch.from_numpy(params.copy()), policy.parameters()
+                    )
+
+            episodes = []
+            for t in range(unroll):
+                for key in obs_keys:
+                    buffers[key][slot, t] = obs[key[4:]]
+                with torch.no_grad():
+                    tensor, _ = policy.obs_to_tensor(obs)
+                    distribution = policy.get_distribution(tensor)
+                    actions = distribution.get_actions()
+                    log_probs = distribution.log_prob(actions)
+                actions = actions.numpy()
+                obs, rewards, dones, infos = env.step(actions)
+                buffers["actions"][slot, t] = actions
+                buffers["log_probs"][slot, t] = log_probs.numpy()
+                buffers["rewards"][slot, t] = rewards
+                buffers["dones"][slot, t] = dones
+                episodes.extend(infos[i]["episode"] for i in np.flatnonzero(dones))
+            for key in obs_keys:
+                buffers[key][slot, unroll] = obs[key[4:]]
+            buffers["versions"][slot] = synced
+            full.put((slot, episodes))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        buffers = params = None
+        for shm in blocks.values():
+            shm.close()
+
+
+class ActorLearner:
+    """Trains an SB3 actor-critic model with asynchronous actors (IMPALA style).
+
+    `n_actors` processes each step a `TetrisVecEnv` of `envs_per_actor` games
+    with their own copy of the policy and write `unroll`-step trajectories
+    into a ring of `slots` shared-memory slots. The learner takes filled slots
+    as they arrive, corrects for the actors' older weights with V-trace and
+    publishes new weights after every update, so acting and optimizing
+    overlap. A full ring blocks the actors; trajectories more than
+    `max_staleness` updates old are dropped.
+    """
+
+    def __init__(
+        self,
+        model,
+        n_actors,
+        envs_per_actor,
+        unroll=32,
+        slots=None,
+        max_staleness=8,
+        seed=0,
+        start_method=None,
+        **env_kwargs,
+    ):
+        self.model = model
+        self.n_actors = n_actors
+        self.envs_per_actor = envs_per_actor
+        self.unroll = unroll
+        self.slots = 2 * n_actors if slots is None else slots
+        self.max_staleness = max_staleness
+        self.updates = 0
+        self.dropped = 0
+
+        policy = model.policy
+        n = envs_per_actor
+        layout = {
+            f"obs.{key}": ((unroll + 1, n, *space.shape), np.float32)
+            for key, space in policy.observation_space.spaces.items()
+        }
+        layout["actions"] = ((unroll, n), np.int64)
+        layout["log_probs"] = ((unroll, n), np.float32)
+        layout["rewards"] = ((unroll, n), np.float32)
+        layout["dones"] = ((unroll, n), np.float32)
+        self.blocks, self.buffers, specs = {}, {}, {}
+        for key, (shape, dtype) in layout.items():
+            self._allocate(key, (self.slots, *shape), dtype, specs)
+        self._allocate("versions", (self.slots,), np.int64, specs)
+        n_params = sum(p.numel() for p in policy.parameters())
+        self._allocate("params", (n_params,), np.float32, specs)
+
+        if start_method is None:
+            methods = mp.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        ctx = mp.get_context(start_method)
+        self.version = ctx.Value("q", 0)
+        self.publish()
+        self.free, self.full = ctx.Queue(), ctx.Queue()
+        for slot in range(self.slots):
+            self.free.put(slot)
+        self.stop = ctx.Event()
+        settings = (
+            type(policy),
+            model.policy_kwargs,
+            envs_per_actor,
+            unroll,
+            env_kwargs,
+            seed,
+        )
+        self.processes = []
+        for rank in range(n_actors):
+            args = (
+                rank,
+                specs,
+                self.free,
+                self.full,
+                self.stop,
+                self.version,
+                settings,
+            )
+            process = ctx.Process(target=_actor, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+
+    def _allocate(self, key, shape, dtype, specs):
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        self.blocks[key] = shm
+        self.buffers[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        specs[key] = (shm.name, shape, dtype)
+
+    def publish(self):
+        """Copy the learner's weights to the actors and bump the version."""
+        with torch.no_grad():
+            weights = parameters_to_vector(self.model.policy.parameters())
+        with self.version.get_lock():
+            self.buffers["params"][:] = weights.cpu().numpy()
+            self.version.value = self.updates
+
+    def update(self, slot):
+        """Run one V-trace actor-critic update on the trajectories in `slot`."""
+        model, policy = self.model, self.model.policy
+        device = policy.device
+        buffers = self.buffers
+
+        def tensor(key):
+            return torch.as_tensor(buffers[key][slot], device=device)
+
+        # Copy out of the ring so the slot can be refilled during the update.
+        obs = {
+            key[4:]: tensor(key).clone() for key in buffers if key.startswith("obs.")
+        }
+        actions = tensor("actions").clone()
+        behaviour_log_probs = tensor("log_probs").clone()
+        rewards = tensor("rewards").clone()
+        dones = tensor("dones").clone()
+        self.free.put(slot)
+
+        T, B = actions.shape
+        steps = {
+            key: value[:T].reshape(T * B, *value.shape[2:])
+            for key, value in obs.items()
+        }
+        policy.set_training_mode(True)
+        values, log_probs, entropy = policy.evaluate_actions(steps, actions.reshape(-1))
+        values, log_probs = values.reshape(T, B), log_probs.reshape(T, B)
+        with torch.no_grad():
+            bootstrap = policy.predict_values(
+                {key: value[T] for key, value in obs.items()}
+            )
+            targets, advantages = vtrace(
+                behaviour_log_probs,
+                log_probs,
+                rewards,
+                values,
+                bootstrap.reshape(B),
+                dones,
+                model.gamma,
+            )
+        policy_loss = -(advantages * log_probs).mean()
+        value_loss = 0.5 * ((targets - values) ** 2).mean()
+        entropy_loss = -entropy.mean()
+        loss = policy_loss + model.vf_coef * value_loss + model.ent_coef * entropy_loss
+
+        policy.optimizer.zero_grad()
+        loss.backward()
+        torch.nn.utils.clip_grad_norm_(policy.parameters(), model.max_grad_norm)
+        policy.optimizer.step()
+        self.updates += 1
+        self.publish()
+        return {
+            "policy_loss": policy_loss.item(),
+            "value_loss": value_loss.item(),
+            "entropy": -entropy_loss.item(),
+        }
+
+    def next_trajectory(self):
+        """Return the next (slot, finished episodes) an actor filled.
+
+        Raises RuntimeError if an actor process died, instead of waiting for
+        trajectories that will never come.
+        """
+        while True:
+            for rank, process in enumerate(self.processes):
+                if not process.is_alive():
+                    raise RuntimeError(
+                        f"actor {rank} (pid {process.pid}) exited with code "
+                        f"{process.exitcode}; see its traceback above"
+                    )
+            try:
+                return self.full.get(timeout=ACTOR_CHECK_EVERY)
+            except queue.Empty:
+                pass
+
+    def learn(self, total_timesteps, save=None, save_every=10_000, log_every=10.0):
+        """Train until the model has seen `total_timesteps` env steps.
+
+        `save` is called every `save_every` steps. Progress (rates, recent
+        episodes, staleness and how long the learner waited on actors) is
+        printed every `log_every` seconds.
+        """
+        model = self.model
+        episodes = deque(maxlen=100)
+        staleness = deque(maxlen=100)
+        steps_per_slot = self.unroll * self.envs_per_actor
+        next_save = model.num_timesteps + save_every
+        start = last_log = time.perf_counter()
+        start_steps, waited = model.num_timesteps, 0.0
+        losses = {}
+        while model.num_timesteps < total_timesteps:
+            wait = time.perf_counter()
+            slot, finished = self.next_trajectory()
+            waited += time.perf_counter() - wait
+            episodes.extend(finished)
+            lag = self.updates - int(self.buffers["versions"][slot])
+            if self.max_staleness is not None and lag > self.max_staleness:
+                self.dropped += 1
+                self.free.put(slot)
+                continue
+            staleness.append(lag)
+            losses = self.update(slot)
+            model.num_timesteps += steps_per_slot
+
+            if save is not None and model.num_timesteps >= next_save:
+                save()
+                next_save += save_every
+            now = time.perf_counter()
+            if now - last_log >= log_every:
+                last_log = now
+                elapsed = now - start
+                lines = np.mean([e["lines"] for e in episodes]) if episodes else 0.0
+                print(
+                    f"timesteps {model.num_timesteps} "
+                    f"({(model.num_timesteps - start_steps) / elapsed:.0f}/s), "
+                    f"updates {self.updates}, lines {lines:.2f}, "
+                    f"staleness {np.mean(staleness):.1f}, dropped {self.dropped}, "
+                    f"learner waiting {waited / elapsed:.0%}, "
+                    + ", ".join(f"{k} {v:.3f}" for k, v in losses.items())
+                )
+
+    def close(self):
+        self.stop.set()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.buffers = {}
+        for shm in self.blocks.values():
+            shm.close()
+            shm.unlink()
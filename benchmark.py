@@ -0,0 +1,313 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from heuristic import HeuristicAgent
+from tetris_env import (
+    COLS,
+    DROP,
+    ENGINES,
+    LEFT,
+    RIGHT,
+    ROTATE,
+    ROWS,
+    SCREEN,
+    TetrisEnv,
+)
+from tetris_metrics import (
+    batch_features,
+    get_aggregate_height,
+    get_blocked_cells,
+    get_bumpiness,
+    get_max_height,
+)
+
+SEED = 0
+BASELINE_PATH = Path("benchmark_baseline.json")
+# A result slower than the baseline by more than this fraction is a regression.
+THRESHOLD = 0.25
+# Frame-mode script: shift the piece, turn it and drop it, cycling through
+# different columns.
+SCRIPT = [LEFT, LEFT, ROTATE, DROP, RIGHT, RIGHT, RIGHT, DROP, ROTATE, LEFT, DROP]
+
+
+def timed(op, n):
+    """Run `op` `n` times and return the calls per second."""
+    start = time.perf_counter()
+    for _ in range(n):
+        op()
+    return n / (time.perf_counter() - start)
+
+
+def sample_boards(n, seed=SEED):
+    """Return `n` boards from heuristic play, as lists and as a stacked array."""
+    env = TetrisEnv(action_mode="placement")
+    agent = HeuristicAgent()
+    env.reset(seed=seed)
+    boards = []
+    while len(boards) < n:
+        _, _, terminated, truncated, _ = env.step(agent.act(env))
+        boards.append([row[:] for row in env.tetris.board])
+        if terminated or truncated:
+            env.reset()
+    return boards, np.array(boards) != 0
+
+
+# ENGINE *********************************************************************
+
+
+def bench_engine(engine, n):
+    make = ENGINES[engine]
+    results = {}
+
+    game = make(ROWS, COLS, SEED)
+    moves = [-1, 1] * (n // 2)
+    start = time.perf_counter()
+    for dx in moves:
+        game.go_side(dx)
+    results["go_side"] = len(moves) / (time.perf_counter() - start)
+
+    game = make(ROWS, COLS, SEED)
+    results["rotate"] = timed(game.rotate, n)
+
+    for op in ("go_down", "hard_drop"):
+        game = make(ROWS, COLS, SEED)
+        start = time.perf_counter()
+        for _ in range(n):
+            if game.gameover:
+                game = make(ROWS, COLS, SEED)
+            getattr(game, op)()
+        results[op] = n / (time.perf_counter() - start)
+
+    # Four full rows under a ragged stack, restored before every clear.
+    game = make(ROWS, COLS, SEED)
+    for row in range(ROWS - 8, ROWS):
+        game.board[row] = [1] * COLS
+    for row in range(ROWS - 8, ROWS - 4):
+        game.board[row][row % COLS] = 0
+    game.recompute_stats()
+    # Restore the whole game, with its board hash known, so every clear
+    # starts from the same state and pays for the hash update it does in
+    # real play.
+    snapshot, board_hash = game.snapshot(), game.board_hash
+    elapsed = 0.0
+    for _ in range(n // 10):
+        game.restore(snapshot, board_hash)
+        start = time.perf_counter()
+        game.remove_line()
+        elapsed += time.perf_counter() - start
+    results["remove_line"] = n // 10 / elapsed
+    return {f"engine.{engine}.{op}": rate for op, rate in results.items()}
+
+
+# ENV ************************************************************************
+
+
+def run_env(env, actions):
+    """Step `env` through `actions`, resetting when an episode ends."""
+    env.reset(seed=SEED)
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    return len(actions) / (time.perf_counter() - start)
+
+
+def bench_env(n):
+    rng = np.random.default_rng(SEED)
+    env = TetrisEnv()
+    results = {
+        "env.step.random": run_env(env, rng.integers(6, size=n).tolist()),
+        "env.step.scripted": run_env(env, (SCRIPT * (n // len(SCRIPT) + 1))[:n]),
+    }
+
+    # The same random frame steps on each engine.
+    for engine in ENGINES:
+        actions = np.random.default_rng(SEED).integers(6, size=n).tolist()
+        results[f"env.engine.{engine}"] = run_env(TetrisEnv(engine=engine), actions)
+
+    seeds = iter(range(n // 10))
+    results["env.reset"] = timed(lambda: env.reset(seed=next(seeds)), n // 10)
+
+    # Random legal placements, so every step locks a piece.
+    env = TetrisEnv(action_mode="placement")
+    env.reset(seed=SEED)
+    steps = n // 10
+    start = time.perf_counter()
+    for _ in range(steps):
+        action = rng.choice(np.flatnonzero(env.action_masks()))
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    results["env.step.placement"] = steps / (time.perf_counter() - start)
+
+    # Observation building on its own: unchanged board vs. a fresh buffer.
+    env = TetrisEnv()
+    env.reset(seed=SEED)
+    for action in SCRIPT * 5:
+        env.step(action)
+    results["observation.update"] = timed(env._get_observation, n)
+
+    def build():
+        env._new_observation()
+        env._get_observation()
+
+    results["observation.full"] = timed(build, n // 10)
+    return results
+
+
+# METRICS ********************************************************************
+
+
+def bench_metrics(n):
+    boards, stacked = sample_boards(min(n // 10, 1000))
+
+    def evaluate(board):
+        get_blocked_cells(board)
+        get_bumpiness(board)
+        get_max_height(board)
+        get_aggregate_height(board)
+
+    start = time.perf_counter()
+    for board in boards:
+        evaluate(board)
+    per_board = len(boards) / (time.perf_counter() - start)
+
+    repeats = max(n // (10 * len(boards)), 1)
+    piece_rows = np.tile(np.arange(ROWS - 4, ROWS), (len(stacked), 1))
+    start = time.perf_counter()
+    for _ in range(repeats):
+        batch_features(stacked, piece_rows)
+    batched = repeats * len(stacked) / (time.perf_counter() - start)
+    return {"metrics.per_board": per_board, "metrics.batch_features": batched}
+
+
+# RENDERING ******************************************************************
+
+
+def bench_render(n):
+    env = TetrisEnv(render_mode="rgb_array")
+    env.reset(seed=SEED)
+    for action in SCRIPT * 5:
+        env.step(action)
+    results = {"render.rgb_array": timed(env.render, n // 10)}
+
+    # A scripted step plus an incremental pygame draw, on a window that is
+    # never shown.
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    from tetris_render import PygameRenderer
+
+    pygame.init()
+    view = PygameRenderer(pygame.display.set_mode(SCREEN))
+    actions = itertools.cycle(SCRIPT)
+
+    def frame():
+        _, _, terminated, truncated, _ = env.step(next(actions))
+        if terminated or truncated:
+            env.reset()
+        view.draw(env.tetris)
+
+    results["render.pygame_step"] = timed(frame, n // 10)
+    pygame.quit()
+    return results
+
+
+BENCHMARKS = {
+    "engine.list": lambda n: bench_engine("list", n),
+    "engine.bitboard": lambda n: bench_engine("bitboard", n),
+    "env": bench_env,
+    "metrics": bench_metrics,
+    "render": bench_render,
+}
+
+
+def run(n, repeat=3, only=None):
+    """Run every benchmark group `repeat` times; keep the best rate of each."""
+    results = {}
+    for group, bench in BENCHMARKS.items():
+        if only and not any(name in group for name in only):
+            continue
+        for _ in range(repeat):
+            for name, rate in bench(n).items():
+                results[name] = max(results.get(name, 0.0), rate)
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Return (name, baseline, current, ratio, regressed) rows."""
+    rows = []
+    for name, rate in results.items():
+        if name not in baseline:
+            continue
+        ratio = rate / baseline[name]
+        rows.append((name, baseline[name], rate, ratio, ratio < 1 - threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Tetris engines, env, metrics and renderer."
+    )
+    parser.add_argument("-n", type=int, default=20_000, help="operations per test")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="benchmark groups to run")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these results as the new baseline",
+    )
+    args = parser.parse_args()
+
+    results = run(args.n, args.repeat, args.only)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "n": args.n,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+    rows = {row[0]: row for row in compare(results, baseline, args.threshold)}
+
+    regressions = 0
+    print(f"{'benchmark':32} {'ops/s':>12} {'baseline':>12} {'ratio':>7}")
+    for name, rate in results.items():
+        if name in rows:
+            _, base, _, ratio, regressed = rows[name]
+            regressions += regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:32} {rate:12.0f} {base:12.0f} {ratio:7.2f}{flag}")
+        else:
+            print(f"{name:32} {rate:12.0f} {'-':>12} {'-':>7}")
+    print(f"results written to {args.output}")
+    if regressions:
+        print(f"{regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
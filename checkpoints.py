@@ -0,0 +1,158 @@
+import copy
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from stable_baselines3.common.save_util import recursive_getattr, save_to_zip_file
+
+INDEX_NAME = "index.json"
+
+
+def snapshot_model(model):
+    """Copy what `model.save` would write, so it can be written later.
+
+    Same selection as `BaseAlgorithm.save`, but every value is deep-copied
+    so training can go on while the copy is serialized.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for name in state_dicts_names + torch_variable_names:
+        exclude.add(name.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+    pytorch_variables = {
+        name: recursive_getattr(model, name) for name in torch_variable_names
+    }
+    return copy.deepcopy((data, model.get_parameters(), pytorch_variables))
+
+
+def _write_atomic(path, write):
+    # Write next to the target and rename over it, so readers only ever see
+    # a missing or a complete file.
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+
+
+def read_index(directory):
+    """Return the checkpoint index of `directory`, reconciled with its files.
+
+    Indexed checkpoints whose file is gone are dropped. `<timestep>.zip`
+    files the index does not list (written before the index existed, or
+    before a crash kept the index from being updated) are added as unmanaged
+    entries, so retention never deletes them.
+    """
+    directory = Path(directory)
+    index_path = directory / INDEX_NAME
+    checkpoints = []
+    if index_path.exists():
+        checkpoints = json.loads(index_path.read_text())["checkpoints"]
+    files = {path.name for path in directory.glob("*.zip") if path.stem.isdigit()}
+    checkpoints = [entry for entry in checkpoints if entry["path"] in files]
+    listed = {entry["path"] for entry in checkpoints}
+    checkpoints += [
+        {"timestep": int(name[:-4]), "path": name, "score": None, "managed": False}
+        for name in files - listed
+    ]
+    checkpoints.sort(key=lambda entry: entry["timestep"])
+    return {"checkpoints": checkpoints}
+
+
+def checkpoint_paths(directory):
+    """Return the paths of the indexed checkpoints, oldest first."""
+    directory = Path(directory)
+    return [directory / entry["path"] for entry in read_index(directory)["checkpoints"]]
+
+
+def latest_checkpoint(directory):
+    """Return the path of the newest checkpoint in `directory`, or None."""
+    paths = checkpoint_paths(directory)
+    return paths[-1] if paths else None
+
+
+def best_checkpoint(directory):
+    """Return the path of the best-scoring checkpoint, or None."""
+    scored = [e for e in read_index(directory)["checkpoints"] if e["score"] is not None]
+    if not scored:
+        return None
+    return Path(directory) / max(scored, key=lambda entry: entry["score"])["path"]
+
+
+class CheckpointSaver:
+    """Saves SB3 models to `<timestep>.zip` files on a background thread.
+
+    `save` copies the model state and returns; serialization, the atomic
+    write and the index update happen in order on one writer thread. After
+    each save only the `keep_last` newest checkpoints and the `keep_best`
+    best-scoring ones (by the score passed to `save`) are kept. Retention
+    only deletes checkpoints a saver wrote; files that were in the directory
+    before it had an index are listed but left alone.
+    """
+
+    def __init__(self, directory, keep_last=5, keep_best=1):
+        if keep_last < 0 or keep_best < 0:
+            raise ValueError("keep_last and keep_best must be >= 0")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.index = read_index(self.directory)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = []
+
+    def save(self, model, timestep, score=None):
+        state = snapshot_model(model)
+        for future in self.pending:
+            if future.done():
+                # Re-raise errors from earlier writes here.
+                future.result()
+        self.pending = [future for future in self.pending if not future.done()]
+        self.pending.append(self.executor.submit(self._write, state, timestep, score))
+
+    def _write(self, state, timestep, score):
+        data, params, pytorch_variables = state
+        path = self.directory / f"{timestep}.zip"
+        _write_atomic(
+            path,
+            lambda file: save_to_zip_file(
+                file, data=data, params=params, pytorch_variables=pytorch_variables
+            ),
+        )
+
+        entries = [e for e in self.index["checkpoints"] if e["timestep"] != timestep]
+        entries.append(
+            {"timestep": timestep, "path": path.name, "score": score, "managed": True}
+        )
+        entries.sort(key=lambda entry: entry["timestep"])
+        # Indexes written before the flag existed only list saved checkpoints.
+        managed = [entry for entry in entries if entry.get("managed", True)]
+        keep = {entry["timestep"] for entry in entries if entry not in managed}
+        newest = managed[max(len(managed) - self.keep_last, 0) :]
+        keep.update(entry["timestep"] for entry in newest)
+        scored = [entry for entry in managed if entry["score"] is not None]
+        scored.sort(key=lambda entry: entry["score"], reverse=True)
+        keep.update(entry["timestep"] for entry in scored[: self.keep_best])
+
+        self.index = {
+            "checkpoints": [entry for entry in entries if entry["timestep"] in keep]
+        }
+        index = json.dumps(self.index, indent=2).encode()
+        _write_atomic(self.directory / INDEX_NAME, lambda file: file.write(index))
+        for entry in entries:
+            if entry["timestep"] not in keep:
+                (self.directory / entry["path"]).unlink(missing_ok=True)
+
+    def wait(self):
+        """Block until every queued checkpoint is on disk."""
+        for future in self.pending:
+            future.result()
+        self.pending = []
+
+    def close(self):
+        self.wait()
+        self.executor.shutdown()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from stable_baselines3 import PPO
+
+from checkpoints import checkpoint_paths
+from train import make_env, models_dir
+
+PERCENTILES = (10, 50, 90)
+
+
+def run_episodes(model, env, n_episodes, seed=0, deterministic=True):
+    """Play `n_episodes` on `env` with batched predictions.
+
+    Game `i` is seeded with `seed + i` and plays its share of the episodes
+    back to back, so every checkpoint sees the same games. Returns the
+    finished episodes' info["episode"] dicts and the env steps per second.
+    """
+    n = env.num_envs
+    targets = np.array([(n_episodes + i) // n for i in range(n)])
+    counts = np.zeros(n, dtype=np.int64)
+    episodes = []
+    env.seed(seed)
+    obs = env.reset()
+    steps = 0
+    start = time.perf_counter()
+    while (counts < targets).any():
+        actions, _ = model.predict(obs, deterministic=deterministic)
+        obs, _, dones, infos = env.step(actions)
+        steps += n
+        for i in np.flatnonzero(dones):
+            if counts[i] < targets[i]:
+                episodes.append(infos[i]["episode"])
+                counts[i] += 1
+    return episodes, steps / (time.perf_counter() - start)
+
+
+def summarize(episodes, steps_per_second):
+    summary = {"episodes": len(episodes), "steps_per_second": steps_per_second}
+    for key, name in (("lines", "lines"), ("pieces", "pieces"), ("l", "length")):
+        values = np.array([episode[key] for episode in episodes])
+        summary[f"{name}_mean"] = float(values.mean())
+        for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            summary[f"{name}_p{q}"] = float(value)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate PPO checkpoints on seeded headless episodes."
+    )
+    parser.add_argument(
+        "checkpoints",
+        nargs="*",
+        type=Path,
+        help="checkpoints to evaluate (default: the latest in models/PPO)",
+    )
+    parser.add_argument("--all", action="store_true", help="every checkpoint")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--envs-per-worker", type=int, default=32)
+    parser.add_argument("--max-episode-steps", type=int, default=20_000)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--stochastic", action="store_true")
+    parser.add_argument("--action-repeat", type=int, default=1)
+    parser.add_argument("--skip-idle", action="store_true")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    args = parser.parse_args()
+
+    paths = args.checkpoints
+    if args.all or not paths:
+        paths = checkpoint_paths(models_dir)
+        if not paths:
+            raise FileNotFoundError(
+                f"No valid model checkpoints found in {models_dir}. Train a model first."
+            )
+        if not args.all:
+            paths = paths[-1:]
+
+    torch.set_num_threads(args.torch_threads)
+    env = make_env(
+        args.workers,
+        args.envs_per_worker,
+        max_episode_steps=args.max_episode_steps,
+        action_repeat=args.action_repeat,
+        skip_idle=args.skip_idle,
+    )
+    results = {}
+    try:
+        for path in paths:
+            model = PPO.load(str(path), device="cpu")
+            episodes, rate = run_episodes(
+                model, env, args.episodes, args.seed, not args.stochastic
+            )
+            summary = summarize(episodes, rate)
+            results[str(path)] = summary
+            print(
+                f"{path}: lines {summary['lines_mean']:.1f} "
+                f"(p10 {summary['lines_p10']:.0f}, p50 {summary['lines_p50']:.0f}, "
+                f"p90 {summary['lines_p90']:.0f}), "
+                f"pieces {summary['pieces_mean']:.1f}, "
+                f"length {summary['length_mean']:.1f}, "
+                f"{rate:.0f} steps/s"
+            )
+    finally:
+        env.close()
+
+    if len(results) > 1:
+        best = max(results, key=lambda path: results[path]["lines_mean"])
+        print(f"best: {best} ({results[best]['lines_mean']:.1f} lines)")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import argparse
+import time
+
+import numpy as np
+
+from tetris import Tetramino
+from tetris_env import HOLD, TetrisEnv, placement_action
+from tetris_metrics import batch_features, clear_lines
+
+# Pierre Dellacherie's features with the weights tuned for El-Tetris.
+EL_TETRIS = {
+    "landing_height": -4.500158825082766,
+    "rows_cleared": 3.4181268101392694,
+    "row_transitions": -3.2178882868487753,
+    "column_transitions": -9.348695305445199,
+    "blocked_cells": -7.899265427351652,
+    "wells": -3.3855972247263626,
+}
+
+
+def drop(boards, type, placements):
+    """Lock a `type` piece into each board at its (rotation, x, y) placement.
+
+    `boards` is a (N, rows, cols) stack and `placements` a (N, 3) array.
+    Returns the boards after line clears, the number of rows cleared on each
+    and the (N, 4) rows the piece was locked into.
+    """
+    cells = np.array(Tetramino.CELLS[type])[placements[:, 0]]
+    rows = placements[:, 2, None] + cells[..., 0]
+    cols = placements[:, 1, None] + cells[..., 1]
+    after = boards.copy()
+    after[np.arange(len(after))[:, None], rows, cols] = 1
+    after, cleared = clear_lines(after)
+    return after, cleared, rows
+
+
+def drop_placements(boards, type):
+    """Find every (rotation, x) a `type` piece fits at on top of each board.
+
+    Pieces are dropped straight down from the spawn row. Returns the index of
+    the board each placement belongs to and a (K, 3) array of (rotation, x, y)
+    placements.
+    """
+    filled = np.asarray(boards) != 0
+    n_boards, n_rows, n_cols = filled.shape
+    candidates = [
+        (rotation, x)
+        for rotation, (_, _, min_dx, max_dx) in enumerate(Tetramino.BOUNDS[type])
+        for x in range(-min_dx, n_cols - max_dx)
+    ]
+    rotation, x = np.array(candidates).T
+    cells = np.array(Tetramino.CELLS[type])[rotation]
+    dy, cols = cells[..., 0], x[:, None] + cells[..., 1]
+
+    # (board, candidate, cell, row) occupancy of each cell's column.
+    columns = filled[:, :, cols].transpose(0, 2, 3, 1)
+    spawn_blocked = np.take_along_axis(columns, dy[None, :, :, None], axis=3)
+    fits = ~spawn_blocked[..., 0].any(axis=2)
+    below = columns & (np.arange(n_rows) > dy[..., None])
+    first = np.where(below.any(axis=3), below.argmax(axis=3), n_rows)
+    landing = (first - dy - 1).min(axis=2)
+
+    board_index, candidate = np.nonzero(fits)
+    placements = np.stack(
+        [rotation[candidate], x[candidate], landing[board_index, candidate]], axis=1
+    )
+    return board_index, placements
+
+
+class HeuristicAgent:
+    """Placement-mode player that scores afterstates with weighted features.
+
+    Every landing position of the current piece is turned into a board and
+    all of them are scored in one batched pass. With `lookahead` each
+    afterstate is scored by the best placement of the next piece on it, and
+    with `use_hold` the held (or next) piece is considered as well.
+    """
+
+    def __init__(self, weights=None, lookahead=False, use_hold=False):
+        self.weights = EL_TETRIS if weights is None else weights
+        self.lookahead = lookahead
+        self.use_hold = use_hold
+
+    def evaluate(self, boards, cleared, piece_rows):
+        features = batch_features(boards, piece_rows)
+        features["rows_cleared"] = cleared
+        return sum(weight * features[key] for key, weight in self.weights.items())
+
+    def score_placements(self, board, type, placements, follow=None):
+        boards = np.repeat(board[None], len(placements), axis=0)
+        after, cleared, rows = drop(boards, type, placements)
+        if follow is None:
+            return self.evaluate(after, cleared, rows)
+
+        index, second = drop_placements(after, follow)
+        after, second_cleared, rows = drop(after[index], follow, second)
+        scores = self.evaluate(after, cleared[index] + second_cleared, rows)
+        best = np.full(len(placements), -np.inf)
+        np.maximum.at(best, index, scores)
+        return best
+
+    def choose(self, tetris):
+        """Return the best (rotation, x) for the current piece, or None to hold."""
+        figure = tetris.figure
+        placements = np.array(tetris.placements(), dtype=np.int64).reshape(-1, 3)
+        if not len(placements):
+            return figure.rotation, figure.x
+
+        board = tetris.occupancy()
+        follow = tetris.next.type if self.lookahead else None
+        scores = self.score_placements(board, figure.type, placements, follow)
+        best = scores.max()
+
+        if self.use_hold and tetris.allow_hold:
+            swap = tetris.hold if tetris.hold is not None else tetris.next
+            spawn = Tetramino(tetris.cols // 2, 0, swap.type, swap.color)
+            swap_placements = np.array(tetris.placements(spawn), dtype=np.int64)
+            # Holding into an empty slot pulls in a piece we cannot see past,
+            # so that branch is compared one piece deep.
+            swap_follow = follow if tetris.hold is not None else None
+            if swap_follow is None and follow is not None:
+                best = self.score_placements(board, figure.type, placements).max()
+            if len(swap_placements):
+                swap_scores = self.score_placements(
+                    board, swap.type, swap_placements.reshape(-1, 3), swap_follow
+                )
+                if swap_scores.max() > best:
+                    return None
+
+        rotation, x, _ = placements[scores.argmax()]
+        return int(rotation), int(x)
+
+    def act(self, env):
+        """Return the placement-mode action for `env`'s current piece."""
+        choice = self.choose(env.tetris)
+        if choice is None:
+            return HOLD
+        return placement_action(env.tetris.figure.type, *choice)
+
+
+def play(agent, episodes, seed=0, max_pieces=None, render=False):
+    env = TetrisEnv(render_mode="human" if render else None, action_mode="placement")
+    results = []
+    for episode in range(episodes):
+        env.reset(seed=seed + episode)
+        terminated = truncated = False
+        start = time.perf_counter()
+        while not (terminated or truncated):
+            _, _, terminated, truncated, _ = env.step(agent.act(env))
+            if render:
+                env.render()
+            if max_pieces and env.tetris.pieces_placed >= max_pieces:
+                break
+        results.append(
+            {
+                "seed": seed + episode,
+                "lines": env.tetris.score,
+                "pieces": env.tetris.pieces_placed,
+                "seconds": time.perf_counter() - start,
+            }
+        )
+    env.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Tetris with a heuristic agent.")
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pieces", type=int, default=1000)
+    parser.add_argument("--lookahead", action="store_true")
+    parser.add_argument("--hold", action="store_true")
+    parser.add_argument("--render", action="store_true")
+    args = parser.parse_args()
+
+    agent = HeuristicAgent(lookahead=args.lookahead, use_hold=args.hold)
+    results = play(agent, args.episodes, args.seed, args.max_pieces, args.render)
+    for result in results:
+        print(
+            f"seed {result['seed']}: {result['lines']} lines, "
+            f"{result['pieces']} pieces, "
+            f"{result['pieces'] / result['seconds']:.0f} pieces/s"
+        )
+    lines = [result["lines"] for result in results]
+    pieces = sum(result["pieces"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    print(f"mean lines {np.mean(lines):.1f}, {pieces / seconds:.0f} pieces/s")
+
+
+if __name__ == "__main__":
+    main()
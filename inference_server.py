@@ -0,0 +1,316 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import numpy as np
+from gymnasium import spaces
+
+from checkpoints import latest_checkpoint
+from tetris_env import OBS_LAYOUT
+
+SOCKET_PATH = "/tmp/tetris-policy.sock"
+OBS_SIZE = sum(size for _, size in OBS_LAYOUT)
+PERCENTILES = (50, 90, 99)
+# Latencies and batch sizes kept for the reported statistics.
+STATS_WINDOW = 10_000
+# First byte of a reply to observations: the int64 actions follow, or the
+# error message when the request could not be served.
+OK, FAILED = b"\x00", b"\x01"
+
+# One client message: its connection and the lock held while sending on it,
+# (n, OBS_SIZE) flat observations and when the server received it.
+Request = namedtuple("Request", "conn lock obs received")
+
+
+def flatten(obs):
+    """Return `TetrisEnv` observations (dict or flat, single or batched) as
+    one (n, OBS_SIZE) float32 array in `OBS_LAYOUT` order."""
+    if isinstance(obs, dict):
+        n = np.asarray(obs["board"]).reshape(-1, OBS_LAYOUT[-1][1]).shape[0]
+        obs = np.concatenate(
+            [
+                np.asarray(obs[key], np.float32).reshape(n, size)
+                for key, size in OBS_LAYOUT
+            ],
+            axis=1,
+        )
+    return np.ascontiguousarray(obs, dtype=np.float32).reshape(-1, OBS_SIZE)
+
+
+def unflatten(obs):
+    """Split (n, OBS_SIZE) observations into a dict of batched fields."""
+    fields = {}
+    start = 0
+    for key, size in OBS_LAYOUT:
+        fields[key] = obs[:, start : start + size]
+        start += size
+    return fields
+
+
+class InferenceServer:
+    """Serves a PPO policy's actions to local clients over a Unix socket.
+
+    Every client message holds one or more flat observations. A batching
+    thread gathers messages until `max_batch` observations are waiting or
+    `max_delay` seconds have passed since the oldest one arrived, runs a
+    single forward pass on the whole batch and sends each client its actions.
+    The newest checkpoint in `models_dir` is checked every `reload_every`
+    seconds and swapped in, once loaded, between batches.
+    """
+
+    def __init__(
+        self,
+        models_dir,
+        address=SOCKET_PATH,
+        max_batch=256,
+        max_delay=0.002,
+        deterministic=True,
+        reload_every=10.0,
+    ):
+        self.models_dir = Path(models_dir)
+        self.address = address
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.deterministic = deterministic
+        self.reload_every = reload_every
+        self.requests = queue.Queue()
+        self.latencies = deque(maxlen=STATS_WINDOW)
+        self.batch_sizes = deque(maxlen=STATS_WINDOW)
+        self.served = 0
+        self.model = self.model_path = None
+        self.next_reload = 0.0
+        self.loading = None
+        self.closed = False
+        self.reload()
+        if self.model is None:
+            raise FileNotFoundError(
+                f"No valid model checkpoints found in {self.models_dir}. "
+                "Train a model first."
+            )
+        self.listener = Listener(self.address, family="AF_UNIX")
+
+    # MODEL ******************************************************************
+
+    def _load(self, path):
+        from stable_baselines3 import PPO
+
+        model = PPO.load(str(path), device="cpu")
+        self.model, self.model_path = model, path
+        print(f"serving {path}")
+
+    def reload(self):
+        """Load the newest checkpoint if it changed; block until loaded."""
+        path = latest_checkpoint(self.models_dir)
+        if path is not None and path != self.model_path:
+            self._load(path)
+
+    def _maybe_reload(self):
+        # Checkpoints load on a helper thread so batches keep flowing with
+        # the current model until the new one is ready.
+        now = time.perf_counter()
+        if now < self.next_reload or (self.loading and self.loading.is_alive()):
+            return
+        self.next_reload = now + self.reload_every
+        path = latest_checkpoint(self.models_dir)
+        if path is not None and path != self.model_path:
+            self.loading = threading.Thread(
+                target=self._load, args=(path,), daemon=True
+            )
+            self.loading.start()
+
+    def predict(self, obs):
+        """Return the actions for (n, OBS_SIZE) flat observations."""
+        import torch
+
+        policy = self.model.policy
+        if isinstance(policy.observation_space, spaces.Dict):
+            obs = unflatten(obs)
+        tensor, _ = policy.obs_to_tensor(obs)
+        with torch.no_grad():
+            actions = policy._predict(tensor, deterministic=self.deterministic)
+        return actions.cpu().numpy().reshape(-1)
+
+    # SERVING ****************************************************************
+
+    def serve_forever(self):
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        while not self.closed:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(
+                target=self._client_loop, args=(conn,), daemon=True
+            ).start()
+
+    def _client_loop(self, conn):
+        # Replies come from this thread and the batch thread; the lock keeps
+        # their frames from interleaving.
+        lock = threading.Lock()
+        try:
+            while True:
+                message = conn.recv_bytes()
+                if not message:
+                    # An empty message asks for the statistics.
+                    self._reply(conn, lock, json.dumps(self.stats()).encode())
+                    continue
+                if len(message) % (4 * OBS_SIZE):
+                    error = (
+                        f"expected float32 observations of {OBS_SIZE} values, "
+                        f"got {len(message)} bytes"
+                    )
+                    self._reply(conn, lock, FAILED + error.encode())
+                    continue
+                obs = np.frombuffer(message, np.float32).reshape(-1, OBS_SIZE)
+                self.requests.put(Request(conn, lock, obs, time.perf_counter()))
+        except (EOFError, OSError):
+            conn.close()
+
+    def _next_batch(self):
+        try:
+            batch = [self.requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        rows = len(batch[0].obs)
+        deadline = batch[0].received + self.max_delay
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = (
+                    self.requests.get(timeout=timeout)
+                    if timeout > 0
+                    else self.requests.get_nowait()
+                )
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request.obs)
+        return batch
+
+    def _batch_loop(self):
+        while not self.closed:
+            self._maybe_reload()
+            batch = self._next_batch()
+            if not batch:
+                continue
+            obs = np.concatenate([request.obs for request in batch])
+            try:
+                actions = self.predict(obs).astype(np.int64)
+            except Exception as error:
+                # Fail this batch's requests but keep serving.
+                print(f"batch of {len(obs)} failed: {error!r}")
+                reply = FAILED + repr(error).encode()
+                for request in batch:
+                    self._reply(request.conn, request.lock, reply)
+                continue
+            start = 0
+            done = time.perf_counter()
+            for request in batch:
+                end = start + len(request.obs)
+                reply = OK + actions[start:end].tobytes()
+                self._reply(request.conn, request.lock, reply)
+                start = end
+                self.latencies.append(done - request.received)
+            self.batch_sizes.append(len(obs))
+            self.served += len(obs)
+
+    def _reply(self, conn, lock, reply):
+        with lock:
+            try:
+                conn.send_bytes(reply)
+            except OSError:
+                pass
+
+    def stats(self):
+        """Return batch size and latency (ms) percentiles over recent batches."""
+        stats = {"model": str(self.model_path), "served": self.served}
+        for name, values, scale in (
+            ("batch", self.batch_sizes, 1),
+            ("latency_ms", self.latencies, 1000),
+        ):
+            values = np.array(values)
+            if values.size:
+                stats[f"{name}_mean"] = float(values.mean() * scale)
+                for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                    stats[f"{name}_p{q}"] = float(value * scale)
+        return stats
+
+    def close(self):
+        self.closed = True
+        self.listener.close()
+
+
+class InferenceClient:
+    """Gets actions from an `InferenceServer`, like `model.predict`."""
+
+    def __init__(self, address=SOCKET_PATH):
+        self.conn = Client(address, family="AF_UNIX")
+
+    def predict(self, obs, state=None, episode_start=None, deterministic=True):
+        """Return (actions, None) for one observation or a batch of them.
+
+        Whether actions are sampled is up to the server; `deterministic` is
+        accepted for compatibility with `model.predict`. Raises RuntimeError
+        when the server could not serve the request.
+        """
+        batched = np.asarray(obs["board"] if isinstance(obs, dict) else obs).ndim > 1
+        self.conn.send_bytes(flatten(obs).tobytes())
+        reply = self.conn.recv_bytes()
+        if reply[:1] != OK:
+            raise RuntimeError(f"inference server: {reply[1:].decode()}")
+        actions = np.frombuffer(reply, np.int64, offset=1)
+        return (actions if batched else actions[0]), None
+
+    def stats(self):
+        self.conn.send_bytes(b"")
+        return json.loads(self.conn.recv_bytes())
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a PPO policy's actions to local clients in micro-batches."
+    )
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--models-dir", type=Path, default=Path("models") / "PPO")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--reload-every", type=float, default=10.0, help="seconds")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds")
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--stochastic", action="store_true")
+    args = parser.parse_args()
+
+    import torch
+
+    torch.set_num_threads(args.torch_threads)
+    Path(args.socket).unlink(missing_ok=True)
+    server = InferenceServer(
+        args.models_dir,
+        args.socket,
+        args.max_batch,
+        args.max_delay_ms / 1000,
+        not args.stochastic,
+        args.reload_every,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"listening on {args.socket}")
+    try:
+        while True:
+            time.sleep(args.report_every)
+            print(json.dumps(server.stats()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,18 @@
 from pathlib import Path
 from stable_baselines3 import PPO
+from checkpoints import latest_checkpoint
 from tetris_env import TetrisEnv
 
 
 def _latest_model_path(models_dir: Path) -> Path:
     """Return the checkpoint with the highest timestep count."""
 
-    checkpoints = []
-    for checkpoint in models_dir.glob("*.zip"):
-        try:
-            timestep = int(checkpoint.stem)
-        except ValueError:
-            continue
-        checkpoints.append((timestep, checkpoint))
-
-    if not checkpoints:
+    checkpoint = latest_checkpoint(models_dir)
+    if checkpoint is None:
         raise FileNotFoundError(
             f"No valid model checkpoints found in {models_dir}. Train a model first."
         )
-
-    checkpoints.sort(key=lambda item: item[0], reverse=True)
-    return checkpoints[0][1]
+    return checkpoint
 
 
 models_dir = Path("models") / "PPO"
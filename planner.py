@@ -0,0 +1,454 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from heuristic import EL_TETRIS, play
+from tetris import SNAPSHOT_HEADER, Tetramino
+from tetris_env import HOLD, TYPE_INDEX, make_observation_space, placement_action
+from tetris_metrics import batch_features
+from transposition import TranspositionCache
+
+# A search node: the game after `depth` placements and its board hash, the
+# lines they cleared, how many pieces the game drew beyond the root, the root
+# move leading here ((rotation, x), or None for a hold) and the rows of the
+# last placed piece.
+Node = namedtuple("Node", "snapshot board_hash lines draws first piece_rows gameover")
+
+
+def snapshot_boards(snapshots, shape):
+    """Return the (N, rows, cols) occupancy of a list of `Tetris` snapshots."""
+    rows, cols = shape
+    start = SNAPSHOT_HEADER.size
+    cells = b"".join(s[start : start + rows * cols] for s in snapshots)
+    return np.frombuffer(cells, np.uint8).reshape(len(snapshots), rows, cols) != 0
+
+
+class HeuristicEvaluator:
+    """Scores leaves with weighted board features, like `HeuristicAgent`."""
+
+    def __init__(self, weights=None):
+        self.weights = EL_TETRIS if weights is None else weights
+
+    def __call__(self, snapshots, lines, piece_rows, shape):
+        features = batch_features(snapshot_boards(snapshots, shape), piece_rows)
+        features["rows_cleared"] = lines
+        return sum(weight * features[key] for key, weight in self.weights.items())
+
+
+class ValueEvaluator:
+    """Scores leaves with a PPO model's value head plus the lines cleared.
+
+    Leaves are turned into `TetrisEnv` dict observations of a freshly spawned
+    piece, so the model must use the default observation mode.
+    """
+
+    def __init__(self, model, base_fall_interval=24):
+        self.model = model
+        self.base_fall_interval = base_fall_interval
+        self.spaces = make_observation_space(base_fall_interval).spaces
+
+    def observations(self, snapshots, shape):
+        n = len(snapshots)
+        obs = {
+            key: np.zeros((n, *space.shape), dtype=np.float32)
+            for key, space in self.spaces.items()
+        }
+        for i, snapshot in enumerate(snapshots):
+            header = SNAPSHOT_HEADER.unpack_from(snapshot)
+            type, _, x, y, rotation, next_type, _, hold_type = header[:8]
+            obs["piece_type"][i, type] = 1
+            obs["rotation"][i, rotation] = 1
+            obs["x"][i] = x
+            obs["y"][i] = y
+            obs["next_piece"][i, next_type] = 1
+            if hold_type < len(TYPE_INDEX):
+                obs["hold_piece"][i, hold_type] = 1
+            obs["level"][i] = header[12]
+        obs["ticks_to_gravity"][:] = self.base_fall_interval
+        obs["board"][:] = snapshot_boards(snapshots, shape).reshape(n, -1)
+        return obs
+
+    def __call__(self, snapshots, lines, piece_rows, shape):
+        import torch
+
+        policy = self.model.policy
+        obs, _ = policy.obs_to_tensor(self.observations(snapshots, shape))
+        with torch.no_grad():
+            values = policy.predict_values(obs)
+        return values.cpu().numpy().ravel() + lines
+
+
+def placements(game, cache=None):
+    """Return `game.placements()`, looked up in `cache` when given."""
+    if cache is None:
+        return game.placements()
+    figure = game.figure
+    key = (game.board_hash, figure.type, figure.rotation, figure.x, figure.y)
+    found = cache.get("placements", key)
+    if found is None:
+        found = game.placements()
+        cache.put("placements", key, found)
+    return found
+
+
+def expand(game, node, use_hold, peek, cache=None):
+    """Return the children of `node`: every placement of its current piece.
+
+    `game` is a scratch engine that is restored to each state in turn. With
+    `use_hold` the held piece (or the next one, when nothing is held) is
+    placed as well. Unless `peek` is set, pieces the player could not have
+    seen at the root (drawn after its next piece) are not placed.
+    """
+    children = []
+    for hold in (False, True) if use_hold else (False,):
+        game.restore(node.snapshot, node.board_hash)
+        draws = node.draws
+        if hold:
+            if not game.allow_hold:
+                continue
+            draws += game.hold is None
+            game.hold_piece()
+        # The current piece was drawn before the root's next piece.
+        if not peek and draws > 1:
+            continue
+        base = game.snapshot()
+        figure = game.figure
+        cells = Tetramino.CELLS[figure.type]
+        for rotation, x, y in placements(game, cache):
+            game.restore(base, node.board_hash)
+            score = game.score
+            game.place(rotation, x)
+            first = node.first
+            if node.first is False:
+                first = None if hold else (rotation, x)
+            children.append(
+                Node(
+                    game.snapshot(),
+                    game.board_hash,
+                    node.lines + game.score - score,
+                    draws + 1,
+                    first,
+                    [y + dy for dy, _ in cells[rotation]],
+                    game.gameover,
+                )
+            )
+    return children
+
+
+def value_key(node):
+    # Everything an evaluator sees besides the board's occupancy: the current
+    # piece and its pose, the next and held pieces, the level, the lines
+    # cleared and the last piece's rows.
+    header = SNAPSHOT_HEADER.unpack_from(node.snapshot)
+    pieces = (header[0], *header[2:6], header[7], header[12])
+    return (node.board_hash, *pieces, node.lines, tuple(node.piece_rows))
+
+
+def evaluate(evaluator, nodes, shape, cache=None):
+    scores = np.empty(len(nodes), dtype=np.float64)
+    missing = range(len(nodes))
+    if cache is not None:
+        keys = [value_key(node) for node in nodes]
+        missing = []
+        for i, key in enumerate(keys):
+            score = cache.get("value", key)
+            if score is None:
+                missing.append(i)
+            else:
+                scores[i] = score
+    if missing:
+        scores[missing] = evaluator(
+            [nodes[i].snapshot for i in missing],
+            np.array([nodes[i].lines for i in missing]),
+            np.array([nodes[i].piece_rows for i in missing]),
+            shape,
+        )
+        if cache is not None:
+            for i in missing:
+                cache.put("value", keys[i], float(scores[i]))
+    scores[[node.gameover for node in nodes]] = -np.inf
+    return scores
+
+
+def best_moves(nodes, scores):
+    """Return {root move: best score among `nodes` reached through it}."""
+    best = {}
+    for node, score in zip(nodes, scores):
+        if node.first not in best or score > best[node.first]:
+            best[node.first] = score
+    return best
+
+
+def beam_search(
+    game,
+    level,
+    scores,
+    evaluator,
+    depth,
+    beam_width,
+    use_hold,
+    peek,
+    budget,
+    cache=None,
+):
+    """Beam search from the nodes in `level`, `depth` placements deep.
+
+    `scores` are the evaluations of `level`. Every level keeps the
+    `beam_width` best states; states with no visible piece left to place are
+    carried over unchanged. `budget` is a (deadline, max nodes) pair; once it
+    runs out the search stops after the current node. Placements and scores
+    are looked up in and added to `cache`, if given. Returns ({root move:
+    best score at the deepest level reached}, depth reached, nodes evaluated).
+    """
+    deadline, max_nodes = budget
+    shape = (game.rows, game.cols)
+    best, reached, nodes = {}, 0, 0
+    for d in range(depth):
+        children, carried = [], []
+        for node, score in zip(level, scores):
+            expanded = expand(game, node, use_hold, peek, cache)
+            children.extend(expanded)
+            if not expanded and node.first is not False:
+                carried.append((node, score))
+            if nodes + len(children) >= max_nodes or time.perf_counter() > deadline:
+                break
+        if not children:
+            break
+        nodes += len(children)
+        level = children + [node for node, _ in carried]
+        scores = np.concatenate(
+            [
+                evaluate(evaluator, children, shape, cache),
+                [score for _, score in carried],
+            ]
+        )
+        best, reached = best_moves(level, scores), d + 1
+        order = np.argsort(-scores, kind="stable")[:beam_width]
+        order = [i for i in order if not level[i].gameover]
+        level, scores = [level[i] for i in order], scores[order]
+        if nodes >= max_nodes or time.perf_counter() > deadline:
+            break
+    return best, reached, nodes
+
+
+_worker_evaluator = None
+_worker_cache = None
+
+
+def _init_worker(evaluator, cache_budget):
+    global _worker_evaluator, _worker_cache
+    _worker_evaluator = evaluator
+    if cache_budget:
+        _worker_cache = TranspositionCache(cache_budget)
+
+
+def _search_subtree(engine, rows, cols, level, scores, settings, budget):
+    game = engine(rows, cols)
+    return beam_search(
+        game, level, scores, _worker_evaluator, *settings, budget, _worker_cache
+    )
+
+
+class BeamPlanner:
+    """Placement-mode player that searches several placements ahead.
+
+    Beam search over cloned game states (`Tetris.snapshot`/`restore`): every
+    placement of the current piece, then of the next one, and so on for
+    `depth` pieces, keeping the `beam_width` best states per level as scored
+    by `evaluator` (board features by default). Without `peek` the search
+    stops at pieces the player cannot see yet, i.e. the current, next and
+    held pieces.
+
+    With `processes` > 1 the root's children are split across a process
+    pool and each share is searched on its own. Every move is limited to
+    `time_budget` seconds and `node_budget` evaluated states.
+
+    With `cache_budget` (bytes), legal placements and leaf scores are kept in
+    a `TranspositionCache` across moves, so positions reached again (by
+    another move order or by the next move's search) are not recomputed.
+    Pool workers each keep their own cache of that size.
+    """
+
+    def __init__(
+        self,
+        evaluator=None,
+        depth=2,
+        beam_width=16,
+        use_hold=True,
+        peek=False,
+        time_budget=None,
+        node_budget=None,
+        processes=1,
+        cache_budget=None,
+    ):
+        self.evaluator = HeuristicEvaluator() if evaluator is None else evaluator
+        self.depth = depth
+        self.beam_width = beam_width
+        self.use_hold = use_hold
+        self.peek = peek
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.processes = processes
+        self.cache = TranspositionCache(cache_budget) if cache_budget else None
+        self.pool = None
+        if processes > 1:
+            self.pool = ProcessPoolExecutor(
+                processes,
+                initializer=_init_worker,
+                initargs=(self.evaluator, cache_budget),
+            )
+        self._games = {}
+        self.last_search = {}
+
+    def scratch(self, tetris):
+        key = (type(tetris), tetris.rows, tetris.cols)
+        if key not in self._games:
+            self._games[key] = type(tetris)(tetris.rows, tetris.cols)
+        return self._games[key]
+
+    def budget(self, start):
+        deadline = np.inf if self.time_budget is None else start + self.time_budget
+        nodes = np.inf if self.node_budget is None else self.node_budget
+        return deadline, nodes
+
+    def choose(self, tetris):
+        """Return the best (rotation, x) for the current piece, or None to hold."""
+        start = time.perf_counter()
+        figure = tetris.figure
+        root = Node(tetris.snapshot(), tetris.board_hash, 0, 0, False, None, False)
+        settings = (self.depth, self.beam_width, self.use_hold, self.peek)
+
+        if self.pool is None or self.depth < 2:
+            best, reached, nodes = beam_search(
+                self.scratch(tetris),
+                [root],
+                [0.0],
+                self.evaluator,
+                *settings,
+                self.budget(start),
+                self.cache,
+            )
+        else:
+            # Evaluate the root's children here and search each worker's
+            # share of them with the rest of the depth and budget.
+            game = self.scratch(tetris)
+            children = expand(game, root, self.use_hold, self.peek, self.cache)
+            scores = evaluate(
+                self.evaluator, children, (game.rows, game.cols), self.cache
+            )
+            best, reached, nodes = best_moves(children, scores), 1, len(children)
+            alive = [i for i, child in enumerate(children) if not child.gameover]
+            deadline, max_nodes = self.budget(start)
+            budget = (deadline, (max_nodes - nodes) / self.processes)
+            settings = (self.depth - 1, *settings[1:])
+            futures = []
+            for w in range(self.processes):
+                share = alive[w :: self.processes]
+                if share:
+                    futures.append(
+                        self.pool.submit(
+                            _search_subtree,
+                            type(tetris),
+                            tetris.rows,
+                            tetris.cols,
+                            [children[i] for i in share],
+                            scores[share],
+                            settings,
+                            budget,
+                        )
+                    )
+            shares = [future.result() for future in futures]
+            deepest = max((share_reached for _, share_reached, _ in shares), default=0)
+            if deepest:
+                best, reached = {}, deepest + 1
+            for share_best, share_reached, share_nodes in shares:
+                nodes += share_nodes
+                if share_reached == deepest:
+                    best.update(share_best)
+
+        self.last_search = {
+            "depth": reached,
+            "nodes": nodes,
+            "seconds": time.perf_counter() - start,
+        }
+        if not best:
+            return figure.rotation, figure.x
+        return max(best, key=lambda move: best[move])
+
+    def act(self, env):
+        """Return the placement-mode action for `env`'s current piece."""
+        choice = self.choose(env.tetris)
+        if choice is None:
+            return HOLD
+        return placement_action(env.tetris.figure.type, *choice)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Tetris with a beam search.")
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pieces", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--beam-width", type=int, default=16)
+    parser.add_argument("--no-hold", action="store_true")
+    parser.add_argument("--peek", action="store_true")
+    parser.add_argument("--time-budget", type=float, help="seconds per move")
+    parser.add_argument("--node-budget", type=int, help="evaluated states per move")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument(
+        "--cache-mb", type=float, default=0, help="transposition cache size"
+    )
+    parser.add_argument("--model", help="PPO checkpoint to score leaves with")
+    parser.add_argument("--render", action="store_true")
+    args = parser.parse_args()
+
+    evaluator = None
+    if args.model:
+        from stable_baselines3 import PPO
+
+        evaluator = ValueEvaluator(PPO.load(args.model, device="cpu"))
+    planner = BeamPlanner(
+        evaluator,
+        depth=args.depth,
+        beam_width=args.beam_width,
+        use_hold=not args.no_hold,
+        peek=args.peek,
+        time_budget=args.time_budget,
+        node_budget=args.node_budget,
+        processes=args.processes or os.cpu_count(),
+        cache_budget=int(args.cache_mb * 2**20),
+    )
+    try:
+        results = play(planner, args.episodes, args.seed, args.max_pieces, args.render)
+    finally:
+        planner.close()
+    for result in results:
+        print(
+            f"seed {result['seed']}: {result['lines']} lines, "
+            f"{result['pieces']} pieces, "
+            f"{result['pieces'] / result['seconds']:.1f} pieces/s"
+        )
+    lines = [result["lines"] for result in results]
+    print(f"mean lines {np.mean(lines):.1f}")
+    if planner.cache is not None:
+        stats = planner.cache.stats()
+        print(
+            f"cache: {stats['entries']} entries, {stats['bytes'] / 2**20:.1f} MB, "
+            f"{stats['evictions']} evictions"
+        )
+        for kind in ("placements", "value"):
+            if kind in stats:
+                print(f"  {kind} hit rate {stats[kind]['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
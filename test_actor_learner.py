@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("stable_baselines3")
+
+from stable_baselines3 import PPO
+
+from actor_learner import ActorLearner, vtrace
+from tetris_vec_env import TetrisVecEnv
+
+
+def test_vtrace_on_policy_gives_discounted_returns():
+    rewards = torch.tensor([[1.0], [0.0], [2.0]])
+    dones = torch.tensor([[0.0], [1.0], [0.0]])
+    log_probs = torch.zeros(3, 1)
+    values = torch.zeros(3, 1)
+    targets, _ = vtrace(
+        log_probs, log_probs, rewards, values, torch.tensor([4.0]), dones, 0.5
+    )
+    expected = [[1.0], [0.0], [2.0 + 0.5 * 4.0]]
+    np.testing.assert_allclose(targets.numpy(), expected)
+
+
+def test_learn_fails_when_an_actor_dies():
+    model = PPO("MultiInputPolicy", TetrisVecEnv(1), n_steps=64, batch_size=64)
+    # An unknown env keyword crashes every actor while it builds its envs.
+    learner = ActorLearner(model, 1, 2, unroll=4, no_such_option=True)
+    try:
+        with pytest.raises(RuntimeError, match="actor 0"):
+            learner.learn(1_000)
+    finally:
+        learner.close()
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+pytest.importorskip("stable_baselines3")
+
+from checkpoints import (
+    INDEX_NAME,
+    CheckpointSaver,
+    checkpoint_paths,
+    latest_checkpoint,
+)
+
+
+class Model:
+    """Stands in for an SB3 model; only the state copy is faked."""
+
+
+@pytest.fixture
+def saver_factory(monkeypatch):
+    monkeypatch.setattr(
+        "checkpoints.snapshot_model", lambda model: ({"n": 1}, {}, None)
+    )
+    savers = []
+
+    def make(directory, **kwargs):
+        saver = CheckpointSaver(directory, **kwargs)
+        savers.append(saver)
+        return saver
+
+    yield make
+    for saver in savers:
+        saver.close()
+
+
+def test_unindexed_checkpoints_are_never_deleted(tmp_path, saver_factory):
+    for timestep in (10_000, 20_000, 30_000):
+        (tmp_path / f"{timestep}.zip").write_bytes(b"old")
+    saver = saver_factory(tmp_path, keep_last=1, keep_best=0)
+    for timestep in (40_000, 50_000):
+        saver.save(Model(), timestep)
+    saver.wait()
+    names = sorted(path.name for path in tmp_path.glob("*.zip"))
+    assert names == ["10000.zip", "20000.zip", "30000.zip", "50000.zip"]
+    assert checkpoint_paths(tmp_path)[-1].name == "50000.zip"
+
+
+def test_keep_last_zero_keeps_only_the_best(tmp_path, saver_factory):
+    saver = saver_factory(tmp_path, keep_last=0, keep_best=1)
+    for timestep, score in ((1, 3.0), (2, 5.0), (3, 4.0)):
+        saver.save(Model(), timestep, score)
+    saver.wait()
+    index = json.loads((tmp_path / INDEX_NAME).read_text())
+    assert [entry["timestep"] for entry in index["checkpoints"]] == [2]
+    assert sorted(path.name for path in tmp_path.glob("*.zip")) == ["2.zip"]
+
+
+def test_keep_last_larger_than_history(tmp_path, saver_factory):
+    saver = saver_factory(tmp_path, keep_last=7, keep_best=0)
+    for timestep in range(1, 7):
+        saver.save(Model(), timestep)
+    saver.wait()
+    assert len(checkpoint_paths(tmp_path)) == 6
+
+
+def test_negative_retention_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CheckpointSaver(tmp_path, keep_last=-1)
+
+
+def test_index_is_reconciled_with_the_files(tmp_path, saver_factory):
+    saver = saver_factory(tmp_path, keep_last=2, keep_best=0)
+    for timestep in (1, 2):
+        saver.save(Model(), timestep)
+    saver.wait()
+    # A crash between writing a checkpoint and indexing it, and a checkpoint
+    # deleted by hand.
+    (tmp_path / "3.zip").write_bytes(b"unindexed")
+    (tmp_path / "1.zip").unlink()
+
+    assert [path.name for path in checkpoint_paths(tmp_path)] == ["2.zip", "3.zip"]
+    assert latest_checkpoint(tmp_path).name == "3.zip"
+    assert "latest" not in json.loads((tmp_path / INDEX_NAME).read_text())
+
+    saver = saver_factory(tmp_path, keep_last=1, keep_best=0)
+    saver.save(Model(), 4)
+    saver.wait()
+    names = sorted(path.name for path in tmp_path.glob("*.zip"))
+    assert names == ["3.zip", "4.zip"]
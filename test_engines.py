@@ -0,0 +1,194 @@
+import functools
+import random
+
+import pytest
+
+import tetris_metrics
+from tetris import Tetris
+from tetris_bitboard import BitboardTetris
+
+ROWS, COLS = 20, 10
+ENGINES = [Tetris, BitboardTetris]
+SEEDS = range(6)
+
+
+def random_actions(seed, steps=3000):
+    # Weighted towards hard drops and holds so games lock many pieces.
+    rng = random.Random(seed)
+    return [rng.choice("llrrddtthhhs") for _ in range(steps)]
+
+
+def step(game, action):
+    if action == "l":
+        game.go_side(-1)
+    elif action == "r":
+        game.go_side(1)
+    elif action == "d":
+        game.go_down()
+    elif action == "t":
+        game.rotate()
+    elif action == "h":
+        game.hard_drop()
+    elif action == "s":
+        game.hold_piece()
+    else:
+        game.place(*action)
+
+
+@functools.lru_cache
+def greedy_actions(seed, pieces=300):
+    # Placements that clear lines and keep the stack low, so games last and
+    # exercise line clears (random play hardly clears any).
+    rng = random.Random(seed)
+    game = Tetris(ROWS, COLS, seed)
+    moves = []
+    while not game.gameover and len(moves) < pieces:
+        start = game.snapshot()
+        best = None
+        for rotation, x, _ in game.placements():
+            game.restore(start)
+            lines = game.score
+            game.place(rotation, x)
+            score = 8 * (game.score - lines) - 4 * game.holes
+            score -= game.aggregate_height + game.bumpiness + rng.random()
+            if best is None or score > best[0]:
+                best = (score, (rotation, x))
+        game.restore(start)
+        step(game, best[1])
+        moves.append(best[1])
+    return moves
+
+
+def play(seed):
+    return random_actions(seed) if seed % 2 else greedy_actions(seed)
+
+
+def state(game):
+    def piece(p):
+        return p and (p.type, p.color, p.x, p.y, p.rotation)
+
+    return (
+        [row[:] for row in game.board],
+        piece(game.figure),
+        piece(game.next),
+        piece(game.hold),
+        game.score,
+        game.level,
+        game.allow_hold,
+        game.gameover,
+        game.pieces_placed,
+    )
+
+
+def zobrist(game):
+    value = 0
+    for row, cells in enumerate(game.board):
+        for col, cell in enumerate(cells):
+            if cell:
+                value ^= game.zobrist[row][col]
+    return value
+
+
+def check_stats(game):
+    board = game.board
+    assert game.column_heights == [
+        tetris_metrics.get_column_height(col, board) for col in range(COLS)
+    ]
+    assert game.holes == tetris_metrics.get_blocked_cells(board)
+    assert game.bumpiness == tetris_metrics.get_bumpiness(board)
+    assert game.max_height == tetris_metrics.get_max_height(board)
+    assert game.aggregate_height == tetris_metrics.get_aggregate_height(board)
+    assert game.row_fill == [sum(1 for cell in row if cell) for row in board]
+    assert game.board_hash == zobrist(game)
+    if isinstance(game, BitboardTetris):
+        assert game.row_masks == [
+            sum(1 << col for col, cell in enumerate(row) if cell) for row in board
+        ]
+
+    # Rebuilding the statistics from the board gives the incremental values.
+    rebuilt = type(game)(ROWS, COLS)
+    rebuilt.board = [row[:] for row in board]
+    rebuilt.recompute_stats()
+    for key in (
+        "column_heights",
+        "row_fill",
+        "filled_cells",
+        "aggregate_height",
+        "holes",
+        "bumpiness",
+        "max_height",
+        "board_hash",
+    ):
+        assert getattr(rebuilt, key) == getattr(game, key), key
+    if isinstance(game, BitboardTetris):
+        assert rebuilt.row_masks == game.row_masks
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_stats_match_metrics(engine, seed):
+    game = engine(ROWS, COLS, seed)
+    for action in play(seed):
+        placed = game.pieces_placed
+        step(game, action)
+        if game.pieces_placed != placed:
+            check_stats(game)
+        if game.gameover:
+            break
+    assert game.pieces_placed > 0
+
+
+def test_greedy_games_clear_lines():
+    game = Tetris(ROWS, COLS, 0)
+    for action in greedy_actions(0):
+        step(game, action)
+    assert game.score >= 20
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_engines_play_the_same_game(seed):
+    games = [engine(ROWS, COLS, seed) for engine in ENGINES]
+    for action in play(seed):
+        for game in games:
+            step(game, action)
+        reference = state(games[0])
+        for game in games[1:]:
+            assert state(game) == reference
+            assert game.board_hash == games[0].board_hash
+        if games[0].gameover:
+            break
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_snapshot_restore_round_trip(engine, seed):
+    game = engine(ROWS, COLS, seed)
+    moves = play(seed)
+    for i, action in enumerate(moves):
+        step(game, action)
+        if game.gameover:
+            break
+        if i % 50:
+            continue
+        snapshot, board_hash = game.snapshot(), game.board_hash
+        expected = state(game)
+        future = moves[i + 1 : i + 100]
+        for action in future:
+            step(game, action)
+        ahead = state(game)
+
+        for other_engine in ENGINES:
+            # Restoring overwrites a game that was in a different state.
+            other = other_engine(ROWS, COLS, seed + 100)
+            other.hard_drop()
+            other.restore(snapshot)
+            assert state(other) == expected
+            assert other.snapshot() == snapshot
+            check_stats(other)
+            for action in future:
+                step(other, action)
+            assert state(other) == ahead
+
+        game.restore(snapshot, board_hash)
+        assert state(game) == expected
+        check_stats(game)
@@ -0,0 +1,85 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("stable_baselines3")
+
+from stable_baselines3 import PPO
+
+from inference_server import (
+    FAILED,
+    OBS_SIZE,
+    OK,
+    InferenceClient,
+    InferenceServer,
+    flatten,
+)
+from tetris_env import TetrisEnv
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    models_dir = tmp_path_factory.mktemp("models")
+    PPO("MultiInputPolicy", TetrisEnv(), n_steps=64, batch_size=64, device="cpu").save(
+        models_dir / "1.zip"
+    )
+    server = InferenceServer(models_dir, str(models_dir / "policy.sock"))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    client = InferenceClient(server.address)
+    yield client
+    client.close()
+
+
+def observations(n):
+    env = TetrisEnv()
+    obs, _ = env.reset(seed=0)
+    return {key: np.stack([value] * n) for key, value in obs.items()}
+
+
+def test_predict_matches_model(server, client):
+    obs = observations(3)
+    actions, _ = client.predict(obs)
+    expected, _ = server.model.predict(obs, deterministic=True)
+    assert actions.tolist() == expected.tolist()
+
+
+def test_malformed_request_gets_an_error(client):
+    client.conn.send_bytes(b"\0" * (4 * OBS_SIZE + 2))
+    reply = client.conn.recv_bytes()
+    assert reply.startswith(FAILED)
+    actions, _ = client.predict(observations(1))
+    assert actions.shape == (1,)
+
+
+def test_failed_batch_keeps_serving(server, client, monkeypatch):
+    def broken(obs):
+        raise RuntimeError("broken model")
+
+    monkeypatch.setattr(server, "predict", broken)
+    with pytest.raises(RuntimeError, match="broken model"):
+        client.predict(observations(2))
+    monkeypatch.undo()
+    actions, _ = client.predict(observations(2))
+    assert actions.shape == (2,)
+
+
+def test_pipelined_replies_stay_whole(client):
+    obs = flatten(observations(4)).tobytes()
+    for _ in range(50):
+        client.conn.send_bytes(obs)
+        client.conn.send_bytes(b"")
+    # Stats are answered at once and actions after their batch, so replies
+    # come back in any order, but each one must arrive whole.
+    replies = [client.conn.recv_bytes() for _ in range(100)]
+    actions = [reply for reply in replies if reply[:1] == OK]
+    stats = [json.loads(reply) for reply in replies if reply[:1] == b"{"]
+    assert len(actions) == len(stats) == 50
+    assert all(len(reply) == 1 + 8 * 4 for reply in actions)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from tetris_metrics import batch_features, batch_wells
+
+
+def board(*rows):
+    return np.array([[cell == "#" for cell in row] for row in rows])
+
+
+def test_wells_sum_each_well_from_its_top():
+    boards = np.stack(
+        [
+            # A well 3 deep in column 1 (1 + 2 + 3), one cell walled in on
+            # column 3 and a 1-deep well at the right wall. The empty cell
+            # under column 3's and the holes in the bottom row are not walled
+            # in, so they are not part of any well.
+            board(
+                "#.#..#",
+                "#.#.##",
+                "#.#..#",
+                "#####.",
+                "#..###",
+            ),
+            # No walls, no wells.
+            board(
+                "......",
+                "......",
+                "......",
+                "......",
+                "#.....",
+            ),
+        ]
+    )
+    assert batch_wells(boards).tolist() == [6 + 1 + 1, 0]
+    assert batch_features(boards)["wells"].tolist() == [8, 0]
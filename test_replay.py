@@ -0,0 +1,37 @@
+import sys
+
+import tetris_replay
+from tetris_env import TetrisEnv
+
+
+def test_episodes_cut_short_by_reset_replay(tmp_path, monkeypatch):
+    log = tmp_path / "episodes.log"
+    env = TetrisEnv(record_path=log, action_mode="placement", checkpoint_every=2)
+    env.action_space.seed(0)
+    for seed in (1, 2, 3):
+        # Reset a few pieces in, before the episode can end on its own.
+        env.reset(seed=seed)
+        for _ in range(4):
+            env.step(env.action_space.sample())
+    env.close()
+
+    episodes = tetris_replay.read_episodes(log)
+    assert [episode.seed for episode in episodes] == [1, 2, 3]
+    assert all(episode.pieces == 4 for episode in episodes)
+    monkeypatch.setattr(sys, "argv", ["tetris_replay.py", str(log)])
+    tetris_replay.main()
+
+
+def test_macro_step_settings_round_trip(tmp_path):
+    log = tmp_path / "episodes.log"
+    env = TetrisEnv(record_path=log, action_repeat=3, skip_idle=True)
+    env.action_space.seed(0)
+    env.reset(seed=1)
+    for _ in range(50):
+        env.step(env.action_space.sample())
+    env.close()
+
+    (episode,) = tetris_replay.read_episodes(log)
+    assert (episode.action_repeat, episode.skip_idle) == (3, True)
+    replayed = tetris_replay.replay(episode)
+    assert replayed.tetris.pieces_placed == episode.pieces > 0
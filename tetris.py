@@ -1,5 +1,8 @@
-import pygame
 import random
+import struct
+from itertools import chain
+
+import numpy as np
 
 CELLSIZE = 20
 ROWS = 20
@@ -42,119 +45,474 @@ class Tetramino:
 
     TYPES = ["I", "Z", "S", "J", "L", "T", "O"]
 
-    def __init__(self, x, y):
+    def __init__(self, x, y, type=None, color=None):
         self.x = x
         self.y = y
-        self.type = random.choice(self.TYPES)
+        self.type = random.choice(self.TYPES) if type is None else type
         self.shape = self.FIGURES[self.type]
-        self.color = random.randint(1, 4)
+        self.color = random.randint(1, 4) if color is None else color
         self.rotation = 0
 
     def image(self):
         return self.shape[self.rotation]
 
+    def cells(self):
+        return self.CELLS[self.type][self.rotation]
+
     def rotate(self):
         self.rotation = (self.rotation + 1) % len(self.shape)
 
 
+def _compile_figures(figures):
+    # Per (type, rotation): (dy, dx) offsets of the occupied cells in
+    # row-major order, the (min_dy, max_dy, min_dx, max_dx) bounding box and
+    # the (dx, lowest dy) profile of every occupied column.
+    cells, bounds, profiles = {}, {}, {}
+    for type, shape in figures.items():
+        cells[type], bounds[type], profiles[type] = [], [], []
+        for image in shape:
+            offsets = tuple(divmod(idx, 4) for idx in sorted(image))
+            dys = [dy for dy, _ in offsets]
+            dxs = [dx for _, dx in offsets]
+            lowest = {}
+            for dy, dx in offsets:
+                lowest[dx] = max(lowest.get(dx, dy), dy)
+            cells[type].append(offsets)
+            bounds[type].append((min(dys), max(dys), min(dxs), max(dxs)))
+            profiles[type].append(tuple(sorted(lowest.items())))
+    return cells, bounds, profiles
+
+
+Tetramino.CELLS, Tetramino.BOUNDS, Tetramino.PROFILES = _compile_figures(
+    Tetramino.FIGURES
+)
+
+
+class PieceStream:
+    """Seeded source of (type index, color) pairs for newly spawned pieces.
+
+    Pieces are drawn from a private NumPy generator in chunks of `chunk_size`,
+    so spawning is a list lookup and every stream is independent of the
+    global `random` state and of other streams.
+    """
+
+    def __init__(self, seed=None, chunk_size=256):
+        self.rng = np.random.default_rng(seed)
+        self.chunk_size = chunk_size
+        self.refill()
+
+    def refill(self):
+        self.chunk_state = self.rng.bit_generator.state
+        self.types = self.rng.integers(0, 7, self.chunk_size).tolist()
+        self.colors = self.rng.integers(1, 5, self.chunk_size).tolist()
+        self.pos = 0
+
+    def get_state(self):
+        """Return (state, inc, has_uint32, uinteger, pos, chunk_size).
+
+        The first four are the PCG64 state the current chunk was drawn from.
+        """
+        chunk = self.chunk_state
+        return (
+            chunk["state"]["state"],
+            chunk["state"]["inc"],
+            chunk["has_uint32"],
+            chunk["uinteger"],
+            self.pos,
+            self.chunk_size,
+        )
+
+    def set_state(self, state, inc, has_uint32, uinteger, pos, chunk_size):
+        chunk = self.chunk_state
+        # Clones of one game usually share a chunk; only redraw it if not.
+        if (
+            chunk_size != self.chunk_size
+            or state != chunk["state"]["state"]
+            or inc != chunk["state"]["inc"]
+            or has_uint32 != chunk["has_uint32"]
+            or uinteger != chunk["uinteger"]
+        ):
+            self.rng.bit_generator.state = {
+                "bit_generator": "PCG64",
+                "state": {"state": state, "inc": inc},
+                "has_uint32": has_uint32,
+                "uinteger": uinteger,
+            }
+            self.chunk_size = chunk_size
+            self.refill()
+        self.pos = pos
+
+    def draw(self):
+        if self.pos == self.chunk_size:
+            self.refill()
+        pos = self.pos
+        self.pos += 1
+        return self.types[pos], self.colors[pos]
+
+
+TYPE_INDEX = {type: i for i, type in enumerate(Tetramino.TYPES)}
+NO_PIECE = 255
+U64 = (1 << 64) - 1
+
+# Fixed-size part of a `Tetris.snapshot()`: current piece (type, color, x, y,
+# rotation), next and hold pieces (type, color), allow_hold, gameover, score,
+# level, pieces_placed, the five board statistics, the piece stream state
+# (PCG64 state and increment as 64-bit halves, has_uint32, uinteger, pos,
+# chunk_size). The board colors, row fill counts and column heights follow
+# as one byte per entry.
+SNAPSHOT_HEADER = struct.Struct("<BBbbBBBBB??III5h4QBIHH")
+
+ZOBRIST_SEED = 0x7E7215
+_zobrist_tables = {}
+
+
+def zobrist_table(rows, cols):
+    """Return the random 64-bit key of every (row, col) cell of a board size.
+
+    A board's hash is the XOR of the keys of its filled cells, whatever
+    their colors, so boards with the same occupancy hash the same.
+    """
+    if (rows, cols) not in _zobrist_tables:
+        rng = random.Random(ZOBRIST_SEED ^ (rows << 16 | cols))
+        _zobrist_tables[rows, cols] = [
+            [rng.getrandbits(64) for _ in range(cols)] for _ in range(rows)
+        ]
+    return _zobrist_tables[rows, cols]
+
+
 class Tetris:
-    def __init__(self, rows, cols, seed=None):
+    def __init__(self, rows, cols, seed=None, stream=None):
         self.rows = rows
         self.cols = cols
         self.score = 0
         self.level = 1
-        self.board = [[0 for j in range(cols)] for i in range(rows)]
         self.next = None
         self.hold = None
         self.allow_hold = True
         self.gameover = False
+        self.pieces_placed = 0
         self.max_height = 0
-        if seed is not None:
-            random.seed(seed)
+        # Board statistics kept up to date on every lock; tetris_metrics has
+        # the reference implementations they match.
+        self.column_heights = [0] * cols
+        self.filled_cells = 0
+        self.aggregate_height = 0
+        self.holes = 0
+        self.bumpiness = 0
+        # Zobrist hash of the board occupancy, updated on every lock and line
+        # clear. None means unknown (after `restore`); `board_hash` then
+        # rebuilds it on first use.
+        self.zobrist = zobrist_table(rows, cols)
+        self._board_hash = 0
+        self._new_board()
+        self.stream = PieceStream(seed) if stream is None else stream
         self.new_figure()
 
+    def _new_board(self):
+        # An empty board and its per-row fill counts.
+        self.board = [[0 for j in range(self.cols)] for i in range(self.rows)]
+        self.row_fill = [0] * self.rows
+
+    def occupancy(self, out=None):
+        """Return the (rows, cols) bool array of filled cells, into `out`."""
+        return np.not_equal(self.board, 0, out=out)
+
+    def spawn(self):
+        type, color = self.stream.draw()
+        return Tetramino(5, 0, Tetramino.TYPES[type], color)
+
     def new_figure(self):
         if not self.next:
-            self.next = Tetramino(5, 0)
+            self.next = self.spawn()
         self.figure = self.next
-        self.next = Tetramino(5, 0)
+        self.next = self.spawn()
+
+    def collides(self, type, rotation, x, y):
+        board = self.board
+        for dy, dx in Tetramino.CELLS[type][rotation]:
+            if (
+                y + dy > self.rows - 1
+                or x + dx > self.cols - 1
+                or x + dx < 0
+                or board[y + dy][x + dx] > 0
+            ):
+                return True
+        return False
 
     def intersects(self):
-        intersection = False
-        for i in range(4):
-            for j in range(4):
-                if i * 4 + j in self.figure.image():
-                    if (
-                        i + self.figure.y > self.rows - 1
-                        or j + self.figure.x > self.cols - 1
-                        or j + self.figure.x < 0
-                        or self.board[i + self.figure.y][j + self.figure.x] > 0
-                    ):
-                        intersection = True
-        return intersection
+        figure = self.figure
+        return self.collides(figure.type, figure.rotation, figure.x, figure.y)
+
+    def drop_distance(self, type, rotation, x, y):
+        """Return how many rows a piece at (rotation, x, y) can fall."""
+        if self.collides(type, rotation, x, y):
+            # An overlapping piece (game over) keeps the step-by-step result.
+            distance = 0
+            while not self.collides(type, rotation, x, y + distance + 1):
+                distance += 1
+            return distance
+        return self._fall_distance(type, rotation, x, y)
+
+    def _fall_distance(self, type, rotation, x, y):
+        # Tetramino columns are contiguous, so only the lowest cell of each
+        # column can hit the stack. Above the column surface the landing row
+        # follows from the column height; below an overhang scan down.
+        board = self.board
+        heights = self.column_heights
+        distance = self.rows
+        for dx, low in Tetramino.PROFILES[type][rotation]:
+            row = self.rows - heights[x + dx]
+            if y + low >= row:
+                row = y + low + 1
+                while row < self.rows and board[row][x + dx] == 0:
+                    row += 1
+            distance = min(distance, row - y - low - 1)
+        return distance
+
+    @property
+    def board_hash(self):
+        if self._board_hash is None:
+            self._board_hash = self._hash_rows(0, self.rows - 1)
+        return self._board_hash
+
+    def _hash_rows(self, top, bottom):
+        # XOR of the keys of the filled cells in rows top..bottom. Rows above
+        # the tallest column are empty and skipped.
+        keys, board, row_fill = self.zobrist, self.board, self.row_fill
+        value = 0
+        for row in range(max(top, self.rows - max(self.column_heights)), bottom + 1):
+            if row_fill[row]:
+                row_keys = keys[row]
+                for col, cell in enumerate(board[row]):
+                    if cell:
+                        value ^= row_keys[col]
+        return value
 
     def remove_line(self):
+        bottom = self._lowest_full_row()
+        if bottom is None:
+            return
+        # Clearing shifts every row above the lowest full one, so their keys
+        # are swapped out and back in; rows below it keep theirs.
+        board_hash = self._board_hash
+        if board_hash is not None:
+            board_hash ^= self._hash_rows(0, bottom)
+        self._clear_rows()
+        if board_hash is not None:
+            self._board_hash = board_hash ^ self._hash_rows(0, bottom)
+
+    def _lowest_full_row(self):
+        row_fill = self.row_fill
+        if self.cols not in row_fill:
+            return None
+        return self.rows - 1 - row_fill[::-1].index(self.cols)
+
+    def _clear_rows(self):
         rerun = False
         for y in range(self.rows - 1, 0, -1):
-            is_full = True
-            for x in range(0, self.cols):
-                if self.board[y][x] == 0:
-                    is_full = False
-            if is_full:
+            if self.row_fill[y] == self.cols:
                 del self.board[y]
                 self.board.insert(0, [0 for i in range(self.cols)])
+                del self.row_fill[y]
+                self.row_fill.insert(0, 0)
+                self.filled_cells -= self.cols
                 self.score += 1
                 if self.score % 10 == 0:
                     self.level += 1
                 rerun = True
 
         if rerun:
-            self.remove_line()
+            self._clear_rows()
+
+    def place_figure(self):
+        figure = self.figure
+        heights = self.column_heights
+        board_hash = self._board_hash
+        for dy, dx in figure.cells():
+            # A piece swapped in over the stack and hard dropped can lock at
+            # y == -1; wrap the row the same way list indexing does.
+            row, col = (figure.y + dy) % self.rows, figure.x + dx
+            if self.board[row][col] == 0:
+                self.row_fill[row] += 1
+                self.filled_cells += 1
+                if board_hash is not None:
+                    board_hash ^= self.zobrist[row][col]
+            self.board[row][col] = figure.color
+            heights[col] = max(heights[col], self.rows - row)
+        self._board_hash = board_hash
+
+    def update_stats(self, cleared):
+        """Refresh the derived board statistics after a lock."""
+        heights = self.column_heights
+        if cleared:
+            # Clearing rows can only lower columns: rescan from the old top.
+            board = self.board
+            for col in range(self.cols):
+                row = self.rows - heights[col]
+                while row < self.rows and board[row][col] == 0:
+                    row += 1
+                heights[col] = self.rows - row
+        self.aggregate_height = sum(heights)
+        self.holes = self.aggregate_height - self.filled_cells
+        self.bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        # Same as tetris_metrics.get_max_height: the rows below the lowest
+        # empty one.
+        self.max_height = self.rows - 1
+        for row in range(self.rows - 1, -1, -1):
+            if self.row_fill[row] == 0:
+                self.max_height = self.rows - row - 1
+                break
+
+    def recompute_stats(self):
+        """Rebuild the board statistics from `board`, e.g. after editing it."""
+        self.row_fill = [sum(1 for cell in row if cell) for row in self.board]
+        self.filled_cells = sum(self.row_fill)
+        self.column_heights = [0] * self.cols
+        for col in range(self.cols):
+            for row in range(self.rows):
+                if self.board[row][col]:
+                    self.column_heights[col] = self.rows - row
+                    break
+        self.update_stats(cleared=False)
+        self._board_hash = None
 
     def freeze(self):
-        freezed = False
-        for i in range(4):
-            for j in range(4):
-                if i * 4 + j in self.figure.image():
-                    self.board[i + self.figure.y][j + self.figure.x] = self.figure.color
-                    freezed = True
+        score = self.score
+        self.place_figure()
+        self.pieces_placed += 1
         self.remove_line()
+        self.update_stats(cleared=self.score != score)
         self.new_figure()
         if self.intersects():
             self.gameover = True
         self.allow_hold = True
-        return freezed
+        return True
+
+    def snapshot(self):
+        """Pack the whole game state into a fixed-size bytes record.
+
+        `restore` brings this or any other game of the same size back to it,
+        including the upcoming pieces.
+        """
+        figure, next, hold = self.figure, self.next, self.hold
+        state, inc, has_uint32, uinteger, pos, chunk_size = self.stream.get_state()
+        header = SNAPSHOT_HEADER.pack(
+            TYPE_INDEX[figure.type],
+            figure.color,
+            figure.x,
+            figure.y,
+            figure.rotation,
+            TYPE_INDEX[next.type],
+            next.color,
+            NO_PIECE if hold is None else TYPE_INDEX[hold.type],
+            0 if hold is None else hold.color,
+            self.allow_hold,
+            self.gameover,
+            self.score,
+            self.level,
+            self.pieces_placed,
+            self.filled_cells,
+            self.aggregate_height,
+            self.holes,
+            self.bumpiness,
+            self.max_height,
+            state >> 64,
+            state & U64,
+            inc >> 64,
+            inc & U64,
+            has_uint32,
+            uinteger,
+            pos,
+            chunk_size,
+        )
+        return b"".join(
+            (
+                header,
+                self._board_bytes(),
+                bytes(self.row_fill),
+                bytes(self.column_heights),
+            )
+        )
+
+    def _board_bytes(self):
+        return bytes(chain.from_iterable(self.board))
+
+    def restore(self, snapshot, board_hash=None):
+        """Return the game to the state recorded by `snapshot`.
+
+        Pass the `board_hash` the game had when the snapshot was taken to
+        skip recomputing it.
+        """
+        (
+            type,
+            color,
+            x,
+            y,
+            rotation,
+            next_type,
+            next_color,
+            hold_type,
+            hold_color,
+            self.allow_hold,
+            self.gameover,
+            self.score,
+            self.level,
+            self.pieces_placed,
+            self.filled_cells,
+            self.aggregate_height,
+            self.holes,
+            self.bumpiness,
+            self.max_height,
+            state_hi,
+            state_lo,
+            inc_hi,
+            inc_lo,
+            has_uint32,
+            uinteger,
+            pos,
+            chunk_size,
+        ) = SNAPSHOT_HEADER.unpack_from(snapshot)
+
+        types = Tetramino.TYPES
+        self.figure = Tetramino(x, y, types[type], color)
+        self.figure.rotation = rotation
+        self.next = Tetramino(5, 0, types[next_type], next_color)
+        self.hold = None
+        if hold_type != NO_PIECE:
+            self.hold = Tetramino(self.cols // 2, 0, types[hold_type], hold_color)
+        self.stream.set_state(
+            state_hi << 64 | state_lo,
+            inc_hi << 64 | inc_lo,
+            has_uint32,
+            uinteger,
+            pos,
+            chunk_size,
+        )
+
+        rows, cols = self.rows, self.cols
+        start = SNAPSHOT_HEADER.size
+        cells = snapshot[start : start + rows * cols]
+        start += rows * cols
+        self._restore_board(cells, snapshot[start : start + rows])
+        self.column_heights = list(snapshot[start + rows : start + rows + cols])
+        self._board_hash = board_hash
+
+    def _restore_board(self, cells, row_fill):
+        # The board from its snapshot bytes: one color byte per cell, then one
+        # fill count per row.
+        cols = self.cols
+        self.board = [list(cells[i : i + cols]) for i in range(0, len(cells), cols)]
+        self.row_fill = list(row_fill)
 
     def project_landing(self):
         if not getattr(self, "figure", None):
             return []
 
-        def collides_at(x, y, image):
-            for i in range(4):
-                for j in range(4):
-                    if i * 4 + j in image:
-                        board_y = y + i
-                        board_x = x + j
-                        if (
-                            board_y > self.rows - 1
-                            or board_x > self.cols - 1
-                            or board_x < 0
-                            or self.board[board_y][board_x] > 0
-                        ):
-                            return True
-            return False
-
-        image = self.figure.image()
-        ghost_y = self.figure.y
-        while not collides_at(self.figure.x, ghost_y + 1, image):
-            ghost_y += 1
-
-        projection = []
-        for i in range(4):
-            for j in range(4):
-                if i * 4 + j in image:
-                    projection.append((ghost_y + i, self.figure.x + j))
-        return projection
+        figure = self.figure
+        ghost_y = figure.y + self.drop_distance(
+            figure.type, figure.rotation, figure.x, figure.y
+        )
+        return [(ghost_y + dy, figure.x + dx) for dy, dx in figure.cells()]
 
     def hold_piece(self):
         if not getattr(self, "figure", None):
@@ -179,10 +537,48 @@ class Tetris:
             self.figure = reset_piece(swap)
             self.allow_hold = False
 
+    def placements(self, figure=None):
+        """Return the hard-drop placements `figure` can reach.
+
+        A placement is a (rotation, x, y) tuple: the figure (the current one
+        by default) can get to (rotation, x) on its current row by moving
+        sideways and rotating, and y is the row it lands on from there.
+        """
+        figure = self.figure if figure is None else figure
+        type, y = figure.type, figure.y
+        start = (figure.rotation, figure.x)
+        if self.collides(type, *start, y):
+            return []
+
+        count = len(figure.shape)
+        reached = {start}
+        frontier = [start]
+        while frontier:
+            rotation, x = frontier.pop()
+            turned = (rotation + 1) % count
+            for move in ((rotation, x - 1), (rotation, x + 1), (turned, x)):
+                if move not in reached and not self.collides(type, *move, y):
+                    reached.add(move)
+                    frontier.append(move)
+        return [
+            (rotation, x, y + self._fall_distance(type, rotation, x, y))
+            for rotation, x in sorted(reached)
+        ]
+
+    def place(self, rotation, x):
+        """Hard drop the current figure from `rotation` and `x`."""
+        self.figure.rotation = rotation
+        self.figure.x = x
+        self.hard_drop()
+
     def hard_drop(self):
-        while not self.intersects():
-            self.figure.y += 1
-        self.figure.y -= 1
+        figure = self.figure
+        if self.intersects():
+            figure.y -= 1
+        else:
+            figure.y += self.drop_distance(
+                figure.type, figure.rotation, figure.x, figure.y
+            )
         self.freeze()
 
     def go_down(self):
@@ -206,166 +602,11 @@ class Tetris:
 
 
 def main():
-    pygame.init()
-    win = pygame.display.set_mode(SCREEN, pygame.NOFRAME)
-    clock = pygame.time.Clock()
-
-    # Images
-    img1 = pygame.image.load("Assets/1.png")
-    img2 = pygame.image.load("Assets/2.png")
-    img3 = pygame.image.load("Assets/3.png")
-    img4 = pygame.image.load("Assets/4.png")
-
-    Assets = {1: img1, 2: img2, 3: img3, 4: img4}
-
-    # Fonts
-    font = pygame.font.Font("Fonts/Alternity-8w7J.ttf", 50)
-    font2 = pygame.font.SysFont("cursive", 25)
-
-    counter = 0
-    move_down = False
-    can_move = True
-
-    tetris = Tetris(ROWS, COLS)
-
-    running = True
-    while running:
-        win.fill(BLACK)
-
-        counter += 1
-        if counter >= 10000:
-            counter = 0
-
-        if can_move:
-            if counter % (FPS // (tetris.level * 2)) == 0 or move_down:
-                if not tetris.gameover:
-                    tetris.go_down()
-
-        # EVENT HANDLING *********************************************************
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-            if event.type == pygame.KEYDOWN:
-                if can_move and not tetris.gameover:
-                    if event.key == pygame.K_LEFT:
-                        tetris.go_side(-1)
-
-                    if event.key == pygame.K_RIGHT:
-                        tetris.go_side(1)
-
-                    if event.key == pygame.K_UP:
-                        tetris.rotate()
-
-                    if event.key == pygame.K_DOWN:
-                        move_down = True
-
-                    if event.key == pygame.K_SPACE:
-                        tetris.hard_drop()
-
-                if event.key == pygame.K_c:
-                    tetris.hold_piece()
-
-                if event.key == pygame.K_r:
-                    tetris.__init__(ROWS, COLS)
-
-                if event.key == pygame.K_p:
-                    can_move = not can_move
-
-                if event.key == pygame.K_q or event.key == pygame.K_ESCAPE:
-                    running = False
-
-            if event.type == pygame.KEYUP:
-                if event.key == pygame.K_DOWN:
-                    move_down = False
-
-        # tetris.draw_grid()
-        for x in range(ROWS):
-            for y in range(COLS):
-                if tetris.board[x][y] > 0:
-                    val = tetris.board[x][y]
-                    img = Assets[val]
-                    win.blit(img, (y * CELLSIZE, x * CELLSIZE))
-                    pygame.draw.rect(
-                        win, WHITE, (y * CELLSIZE, x * CELLSIZE, CELLSIZE, CELLSIZE), 1
-                    )
-
-        if tetris.figure:
-            for i in range(4):
-                for j in range(4):
-                    if i * 4 + j in tetris.figure.image():
-                        img = Assets[tetris.figure.color]
-                        x = CELLSIZE * (tetris.figure.x + j)
-                        y = CELLSIZE * (tetris.figure.y + i)
-                        win.blit(img, (x, y))
-                        pygame.draw.rect(win, WHITE, (x, y, CELLSIZE, CELLSIZE), 1)
-
-        ghost_cells = tetris.project_landing()
-        for row, col in ghost_cells:
-            ghost_rect = pygame.Rect(col * CELLSIZE, row * CELLSIZE, CELLSIZE, CELLSIZE)
-            pygame.draw.rect(win, WHITE, ghost_rect, 1)
-
-        # GAMEOVER ***************************************************************
-
-        if tetris.gameover:
-            rect = pygame.Rect((50, 140, WIDTH - 100, HEIGHT - 350))
-            pygame.draw.rect(win, BLACK, rect)
-            pygame.draw.rect(win, RED, rect, 2)
-
-            over = font2.render("Game Over", True, WHITE)
-            msg1 = font2.render("Press r to restart", True, RED)
-            msg2 = font2.render("Press q to quit", True, RED)
-
-            win.blit(over, (rect.centerx - over.get_width() / 2, rect.y + 20))
-            win.blit(msg1, (rect.centerx - msg1.get_width() / 2, rect.y + 80))
-            win.blit(msg2, (rect.centerx - msg2.get_width() / 2, rect.y + 110))
-
-        # HUD ********************************************************************
-
-        hud_top = HEIGHT - HUD_HEIGHT
-        pygame.draw.rect(win, BLUE, (0, hud_top, WIDTH, HUD_HEIGHT))
-        preview_margin_x = CELLSIZE
-        next_origin_y = hud_top + 10
-        hold_origin_y = next_origin_y + 4 * CELLSIZE + 20
-
-        if tetris.next:
-            next_image = tetris.next.image()
-            img = Assets[tetris.next.color]
-            base_x = preview_margin_x
-            for idx in next_image:
-                row, col = divmod(idx, 4)
-                x = base_x + col * CELLSIZE
-                y = next_origin_y + row * CELLSIZE
-                win.blit(img, (x, y))
-
-        if tetris.hold:
-            hold_image = tetris.hold.image()
-            img = Assets[tetris.hold.color]
-            base_x = preview_margin_x
-            for idx in hold_image:
-                row, col = divmod(idx, 4)
-                x = base_x + col * CELLSIZE
-                y = hold_origin_y + row * CELLSIZE
-                win.blit(img, (x, y))
-
-        scoreimg = font.render(f"{tetris.score}", True, WHITE)
-        levelimg = font2.render(f"Level : {tetris.level}", True, WHITE)
-        win.blit(
-            scoreimg,
-            (WIDTH // 2 - scoreimg.get_width() // 2 + WIDTH // 4, hud_top + 10),
-        )
-        win.blit(
-            levelimg,
-            (
-                WIDTH // 2 - levelimg.get_width() // 2 + WIDTH // 4,
-                hud_top + HUD_HEIGHT - levelimg.get_height() - 10,
-            ),
-        )
+    # The pygame front-end lives in tetris_gui so that headless users of the
+    # game core never import pygame.
+    import tetris_gui
 
-        pygame.draw.rect(win, BLUE, (0, 0, WIDTH, hud_top), 2)
-        clock.tick(FPS)
-        pygame.display.update()
-    pygame.quit()
+    tetris_gui.main()
 
 
 if __name__ == "__main__":
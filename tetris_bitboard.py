@@ -0,0 +1,240 @@
+import numpy as np
+
+from tetris import Tetris, Tetramino
+
+# bytes.translate table mapping cell colors to 0 (empty) or 1 (filled).
+OCCUPIED = bytes([0] + [1] * 255)
+
+
+def _compile_masks(cols):
+    # For every (type, rotation) map each x the piece fits at horizontally to
+    # a tuple of (dy, row_mask) pairs. Bit c of a row mask is board column c.
+    masks = {}
+    for type, per_rotation_cells in Tetramino.CELLS.items():
+        per_rotation = []
+        for cells, bounds in zip(per_rotation_cells, Tetramino.BOUNDS[type]):
+            _, _, min_dx, max_dx = bounds
+            by_x = {}
+            for x in range(-min_dx, cols - max_dx):
+                rows = {}
+                for dy, dx in cells:
+                    rows[dy] = rows.get(dy, 0) | (1 << (x + dx))
+                by_x[x] = tuple(sorted(rows.items()))
+            per_rotation.append(by_x)
+        masks[type] = per_rotation
+    return masks
+
+
+def _compile_rows(cols):
+    # For every row mask, the columns it fills and its (cols,) occupancy.
+    columns = [
+        tuple(col for col in range(cols) if mask >> col & 1)
+        for mask in range(1 << cols)
+    ]
+    occupancy = np.zeros((1 << cols, cols), dtype=bool)
+    for mask, filled in enumerate(columns):
+        occupancy[mask, list(filled)] = True
+    return columns, occupancy
+
+
+class BitboardTetris(Tetris):
+    """Tetris engine whose board is one integer bitmask per row.
+
+    Plays exactly the same game as `Tetris` for a given seed and action
+    sequence. `row_masks` is the board: collisions, drop distances, locking,
+    line clears, the board statistics and the board hash all work on it.
+    Cell colors are kept per row in `row_colors` for snapshots and
+    rendering, and the list `board` is only built from them when read.
+    """
+
+    _mask_cache = {}
+    _row_tables = {}
+    _row_cache = {}
+    _hash_caches = {}
+
+    def __init__(self, rows, cols, seed=None, stream=None):
+        if cols not in self._mask_cache:
+            self._mask_cache[cols] = _compile_masks(cols)
+            self._row_tables[cols] = _compile_rows(cols)
+        self.masks = self._mask_cache[cols]
+        self.columns, self.occupied_rows = self._row_tables[cols]
+        self.full_row = (1 << cols) - 1
+        # Zobrist hash of each (row, row mask), shared by games of a size.
+        self.row_hashes = self._hash_caches.setdefault((rows, cols), {})
+        super().__init__(rows, cols, seed, stream)
+
+    def _new_board(self):
+        self.row_masks = [0] * self.rows
+        self.row_colors = [bytearray(self.cols) for _ in range(self.rows)]
+        self._board = None
+
+    @property
+    def board(self):
+        if self._board is None:
+            self._board = [list(row) for row in self.row_colors]
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        # Like edits to the list engine's board, this takes effect on the
+        # next `recompute_stats`.
+        self._board = board
+
+    @property
+    def row_fill(self):
+        return [mask.bit_count() for mask in self.row_masks]
+
+    def occupancy(self, out=None):
+        rows = self.occupied_rows[self.row_masks]
+        if out is None:
+            return rows
+        out[...] = rows
+        return out
+
+    def collides(self, type, rotation, x, y):
+        rows = self.masks[type][rotation].get(x)
+        if rows is None:
+            return True
+        board = self.row_masks
+        for dy, mask in rows:
+            if y + dy > self.rows - 1 or board[y + dy] & mask:
+                return True
+        return False
+
+    def _fall_distance(self, type, rotation, x, y):
+        # Same as `Tetris._fall_distance`, scanning below overhangs on the
+        # row masks.
+        masks = self.row_masks
+        heights = self.column_heights
+        distance = self.rows
+        for dx, low in Tetramino.PROFILES[type][rotation]:
+            row = self.rows - heights[x + dx]
+            if y + low >= row:
+                bit = 1 << (x + dx)
+                row = y + low + 1
+                while row < self.rows and not masks[row] & bit:
+                    row += 1
+            distance = min(distance, row - y - low - 1)
+        return distance
+
+    def _hash_rows(self, top, bottom):
+        masks, cache, cols = self.row_masks, self.row_hashes, self.cols
+        value = 0
+        for row in range(max(top, self.rows - max(self.column_heights)), bottom + 1):
+            mask = masks[row]
+            if mask:
+                key = row << cols | mask
+                row_hash = cache.get(key)
+                if row_hash is None:
+                    row_keys = self.zobrist[row]
+                    row_hash = 0
+                    for col in self.columns[mask]:
+                        row_hash ^= row_keys[col]
+                    cache[key] = row_hash
+                value ^= row_hash
+        return value
+
+    def _lowest_full_row(self):
+        masks = self.row_masks
+        if self.full_row not in masks:
+            return None
+        return self.rows - 1 - masks[::-1].index(self.full_row)
+
+    def _clear_rows(self):
+        full_row = self.full_row
+        masks = self.row_masks
+        cleared = [y for y in range(1, self.rows) if masks[y] == full_row]
+        if not cleared:
+            return
+        # Row 0 is only scanned once the rows below it have shifted it down.
+        if masks[0] == full_row:
+            cleared.insert(0, 0)
+
+        colors = self.row_colors
+        for y in reversed(cleared):
+            del masks[y]
+            del colors[y]
+        for _ in cleared:
+            masks.insert(0, 0)
+            colors.insert(0, bytearray(self.cols))
+            self.filled_cells -= self.cols
+            self.score += 1
+            if self.score % 10 == 0:
+                self.level += 1
+        self._board = None
+
+    def place_figure(self):
+        figure = self.figure
+        masks, colors = self.row_masks, self.row_colors
+        heights = self.column_heights
+        board_hash = self._board_hash
+        for dy, dx in figure.cells():
+            # Rows wrap like `Tetris.place_figure` for pieces locked at y == -1.
+            row, col = (figure.y + dy) % self.rows, figure.x + dx
+            bit = 1 << col
+            if not masks[row] & bit:
+                masks[row] |= bit
+                self.filled_cells += 1
+                if board_hash is not None:
+                    board_hash ^= self.zobrist[row][col]
+            colors[row][col] = figure.color
+            heights[col] = max(heights[col], self.rows - row)
+        self._board_hash = board_hash
+        self._board = None
+
+    def update_stats(self, cleared):
+        heights = self.column_heights
+        rows, masks = self.rows, self.row_masks
+        if cleared:
+            # Clearing rows can only lower columns: rescan from the old top,
+            # taking each column's first filled row.
+            seen = 0
+            for row in range(rows - max(heights), rows):
+                new = masks[row] & ~seen
+                if new:
+                    for col in self.columns[new]:
+                        heights[col] = rows - row
+                    seen |= new
+            for col in self.columns[self.full_row & ~seen]:
+                heights[col] = 0
+        self.aggregate_height = sum(heights)
+        self.holes = self.aggregate_height - self.filled_cells
+        self.bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        self.max_height = rows - 1
+        for row in range(rows - 1, -1, -1):
+            if not masks[row]:
+                self.max_height = rows - row - 1
+                break
+
+    def recompute_stats(self):
+        board = self.board
+        self.row_colors = [bytearray(row) for row in board]
+        self.row_masks = [
+            sum(1 << col for col, cell in enumerate(row) if cell) for row in board
+        ]
+        self._board = None
+        self.filled_cells = sum(self.row_fill)
+        self.column_heights = [self.rows] * self.cols
+        self.update_stats(cleared=True)
+        self._board_hash = None
+
+    def _board_bytes(self):
+        return b"".join(self.row_colors)
+
+    def _restore_board(self, cells, row_fill):
+        # Row masks from the snapshot's board bytes, memoized per row pattern.
+        cols = self.cols
+        cache = self._row_cache
+        occupied = cells.translate(OCCUPIED)
+        colors, masks = [], []
+        for i in range(0, len(cells), cols):
+            colors.append(bytearray(cells[i : i + cols]))
+            row = occupied[i : i + cols]
+            mask = cache.get(row)
+            if mask is None:
+                mask = cache[row] = sum(
+                    1 << col for col, cell in enumerate(row) if cell
+                )
+            masks.append(mask)
+        self.row_colors, self.row_masks = colors, masks
+        self._board = None
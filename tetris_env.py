@@ -1,10 +1,11 @@
+import struct
+
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-from tetris import Tetris
-from tetris_metrics import *
-import pygame
-import copy
+from tetris import Tetramino, Tetris
+from tetris_bitboard import BitboardTetris
+from tetris_profile import PhaseProfiler
 
 CELLSIZE = 20
 ROWS = 20
@@ -15,6 +16,9 @@ WIDTH = COLS * CELLSIZE
 HEIGHT = ROWS * CELLSIZE + HUD_HEIGHT
 SCREEN = WIDTH, HEIGHT
 LEFT, RIGHT, DOWN, ROTATE, DROP, NONE = 0, 1, 2, 3, 4, 5
+# Placement mode: action rotation * COLS + column drops the piece with its
+# leftmost cell in that column; HOLD swaps with the held piece.
+HOLD = 4 * COLS
 
 # COLORS *********************************************************************
 
@@ -25,107 +29,226 @@ WHITE = (255, 255, 255)
 
 FPS = 48
 
+ENGINES = {"list": Tetris, "bitboard": BitboardTetris}
+TYPE_INDEX = {type: i for i, type in enumerate(Tetramino.TYPES)}
+
+# Env part of `TetrisEnv.snapshot()`: frame, next_gravity_frame,
+# fall_interval, the bumpiness/height/hole_count/score/level seen at the last
+# lock, steps_without_scoring and steps_until_truncated. The engine snapshot
+# follows.
+ENV_SNAPSHOT_HEADER = struct.Struct("<qq8i")
+
+# Field order and sizes of the flat observation vector.
+OBS_LAYOUT = (
+    ("piece_type", 7),
+    ("rotation", 4),
+    ("x", 1),
+    ("y", 1),
+    ("ticks_to_gravity", 1),
+    ("next_piece", 7),
+    ("hold_piece", 7),
+    ("level", 1),
+    ("board", ROWS * COLS),
+)
+
+
+def make_observation_space(base_fall_interval):
+    return spaces.Dict(
+        spaces={
+            "piece_type": spaces.Box(
+                low=np.array([0, 0, 0, 0, 0, 0, 0]),
+                high=np.array([1, 1, 1, 1, 1, 1, 1]),
+                shape=(7,),
+                dtype=np.float32,
+            ),
+            "rotation": spaces.Box(
+                low=np.array([0, 0, 0, 0]),
+                high=np.array([1, 1, 1, 1]),
+                shape=(4,),
+                dtype=np.float32,
+            ),
+            "x": spaces.Box(low=-1, high=COLS - 1, shape=(1,), dtype=np.float32),
+            "y": spaces.Box(low=0, high=ROWS - 1, shape=(1,), dtype=np.float32),
+            "ticks_to_gravity": spaces.Box(
+                low=0, high=base_fall_interval, shape=(1,), dtype=np.float32
+            ),
+            "next_piece": spaces.Box(
+                low=np.array([0, 0, 0, 0, 0, 0, 0]),
+                high=np.array([1, 1, 1, 1, 1, 1, 1]),
+                shape=(7,),
+                dtype=np.float32,
+            ),
+            "hold_piece": spaces.Box(
+                low=np.array([0, 0, 0, 0, 0, 0, 0]),
+                high=np.array([1, 1, 1, 1, 1, 1, 1]),
+                shape=(7,),
+                dtype=np.float32,
+            ),
+            "level": spaces.Box(low=1, high=1000, shape=(1,), dtype=np.float32),
+            "board": spaces.Box(low=0, high=1, shape=(ROWS * COLS,), dtype=np.float32),
+        }
+    )
+
 
-class TetrisEnv(gym.Env):
-    metadata = {"render_modes": ["human"], "render_fps": FPS}
+def placement_action(type, rotation, x):
+    """Encode dropping a `type` piece at (rotation, x) as a placement action."""
+    return rotation * COLS + x + Tetramino.BOUNDS[type][rotation][2]
+
+
+def make_flat_observation_space(base_fall_interval):
+    fields = make_observation_space(base_fall_interval)
+    return spaces.Box(
+        low=np.concatenate([fields[key].low for key, _ in OBS_LAYOUT]),
+        high=np.concatenate([fields[key].high for key, _ in OBS_LAYOUT]),
+        dtype=np.float32,
+    )
 
-    def __init__(self, render_mode: str | None = None, base_fall_interval=24):
+
+class TetrisEnv(gym.Env):
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": FPS}
+
+    def __init__(
+        self,
+        render_mode: str | None = None,
+        base_fall_interval=24,
+        engine: str = "bitboard",
+        observation_mode: str = "dict",
+        action_mode: str = "frame",
+        profile: bool = False,
+        profile_info: bool = False,
+        record_path=None,
+        checkpoint_every=1000,
+        action_repeat=1,
+        skip_idle=False,
+    ):
         super(TetrisEnv, self).__init__()
         self.render_mode = render_mode
         self.base_fall_interval = base_fall_interval
-        self.action_space = spaces.Discrete(6)
-        self.observation_space = spaces.Dict(
-            spaces={
-                "piece_type": spaces.Box(
-                    low=np.array([0, 0, 0, 0, 0, 0, 0]),
-                    high=np.array([1, 1, 1, 1, 1, 1, 1]),
-                    shape=(7,),
-                    dtype=np.float32,
-                ),
-                "rotation": spaces.Box(
-                    low=np.array([0, 0, 0, 0]),
-                    high=np.array([1, 1, 1, 1]),
-                    shape=(4,),
-                    dtype=np.float32,
-                ),
-                "x": spaces.Box(low=-1, high=COLS - 1, shape=(1,), dtype=np.float32),
-                "y": spaces.Box(low=0, high=ROWS - 1, shape=(1,), dtype=np.float32),
-                "ticks_to_gravity": spaces.Box(
-                    low=0, high=self.base_fall_interval, shape=(1,), dtype=np.float32
-                ),
-                "next_piece": spaces.Box(
-                    low=np.array([0, 0, 0, 0, 0, 0, 0]),
-                    high=np.array([1, 1, 1, 1, 1, 1, 1]),
-                    shape=(7,),
-                    dtype=np.float32,
-                ),
-                "hold_piece": spaces.Box(
-                    low=np.array([0, 0, 0, 0, 0, 0, 0]),
-                    high=np.array([1, 1, 1, 1, 1, 1, 1]),
-                    shape=(7,),
-                    dtype=np.float32,
-                ),
-                "level": spaces.Box(low=1, high=1000, shape=(1,), dtype=np.float32),
-                "board": spaces.Box(
-                    low=0, high=1, shape=(ROWS * COLS,), dtype=np.float32
-                ),
-            }
-        )
+        self.engine = ENGINES[engine]
+        self.observation_mode = observation_mode
+        self.action_mode = action_mode
+        if action_repeat < 1:
+            raise ValueError(f"action_repeat must be at least 1, got {action_repeat}")
+        self.action_repeat = action_repeat
+        self.skip_idle = skip_idle
+        # Frame mode only: one step may play several frames.
+        self.macro_step = action_mode == "frame" and (action_repeat > 1 or skip_idle)
+        self._placements_key = None
+        if action_mode == "placement":
+            self.action_space = spaces.Discrete(HOLD + 1)
+        elif action_mode == "frame":
+            self.action_space = spaces.Discrete(6)
+        else:
+            raise ValueError(f"Unknown action_mode {action_mode!r}")
+        if observation_mode == "flat":
+            self.observation_space = make_flat_observation_space(base_fall_interval)
+        elif observation_mode == "dict":
+            self.observation_space = make_observation_space(base_fall_interval)
+        else:
+            raise ValueError(f"Unknown observation_mode {observation_mode!r}")
         if self.render_mode == "human":
+            import pygame
+
+            from tetris_render import PygameRenderer
+
             pygame.init()
             self.win = pygame.display.set_mode(SCREEN, pygame.NOFRAME)
             self.clock = pygame.time.Clock()
-            self.img1 = pygame.image.load("Assets/1.png")
-            self.img2 = pygame.image.load("Assets/2.png")
-            self.img3 = pygame.image.load("Assets/3.png")
-            self.img4 = pygame.image.load("Assets/4.png")
-            self.Assets = {1: self.img1, 2: self.img2, 3: self.img3, 4: self.img4}
-            self.font = pygame.font.Font("Fonts/Alternity-8w7J.ttf", 50)
-            self.font2 = pygame.font.SysFont("cursive", 25)
+            self.view = PygameRenderer(self.win)
+        elif self.render_mode == "rgb_array":
+            from tetris_raster import RgbRenderer
+
+            self.raster = RgbRenderer()
+
+        self.recorder = None
+        if record_path is not None:
+            from tetris_replay import EpisodeRecorder
+
+            self.recorder = EpisodeRecorder(record_path, checkpoint_every)
+
+        # Profiling only wraps methods of this env and its engine, so a
+        # disabled profiler adds no work to step.
+        self.profiler = None
+        if profile or profile_info:
+            self.profiler = PhaseProfiler()
+            self.profiler.wrap(self, "step", "step")
+            if action_mode == "placement":
+                self.profiler.wrap(self, "_place", "action")
+            else:
+                self.profiler.wrap(self, "_act", "action")
+            self.profiler.wrap(self, "_gravity", "gravity")
+            self.profiler.wrap(self, "_reward", "reward")
+            self.profiler.wrap(self, "_get_observation", "observation")
+            if profile_info:
+                step = self.step
+
+                def step_with_profile(action):
+                    obs, reward, terminated, truncated, info = step(action)
+                    info["profile"] = self.get_profile()
+                    return obs, reward, terminated, truncated, info
+
+                self.step = step_with_profile
+
+    def _new_observation(self):
+        # Observations are written in place into one float32 vector; the dict
+        # fields are views into it. A fresh buffer per episode keeps terminal
+        # observations intact after an automatic reset.
+        self._obs = np.zeros(sum(size for _, size in OBS_LAYOUT), dtype=np.float32)
+        self._obs_fields = {}
+        start = 0
+        for key, size in OBS_LAYOUT:
+            self._obs_fields[key] = self._obs[start : start + size]
+            start += size
+        self._obs_board = self._obs_fields["board"].reshape(ROWS, COLS)
+        self._obs_written = {}
+
+    def _write_one_hot(self, key, index):
+        previous = self._obs_written.get(key)
+        if previous != index:
+            field = self._obs_fields[key]
+            if previous is not None:
+                field[previous] = 0
+            if index is not None:
+                field[index] = 1
+            self._obs_written[key] = index
 
     def _get_observation(self):
-        if self.tetris.next is None:
+        # The returned arrays are updated in place by the next step; copy them
+        # to keep an observation around.
+        tetris = self.tetris
+        if tetris.next is None:
             raise ValueError
 
-        type_to_num = {"I": 0, "Z": 1, "S": 2, "J": 3, "L": 4, "T": 5, "O": 6}
-
-        type_oh_enc = np.zeros(7, dtype=np.float32)
-        type_oh_enc[type_to_num[self.tetris.figure.type]] = 1
-
-        next_piece_oh_enc = np.zeros(7, dtype=np.float32)
-        next_piece_oh_enc[type_to_num[self.tetris.next.type]] = 1
-
-        rotation_oh_env = np.zeros(4, dtype=np.float32)
-        rotation_oh_env[self.tetris.figure.rotation] = 1
-
-        hold_piece_oh_enc = np.zeros(7, dtype=np.float32)
-        if self.tetris.hold is not None:
-            hold_piece_oh_enc[type_to_num[self.tetris.hold.type]] = 1
-
-        board = np.array(self.tetris.board)
-        obs = {
-            "piece_type": type_oh_enc,
-            "rotation": rotation_oh_env,
-            "x": np.array([self.tetris.figure.x], dtype=np.float32),
-            "y": np.array([self.tetris.figure.y], dtype=np.float32),
-            "ticks_to_gravity": np.array(
-                [
-                    np.clip(
-                        self.next_gravity_frame - self.frame, 0, self.base_fall_interval
-                    )
-                ],
-                dtype=np.float32,
-            ),
-            "next_piece": next_piece_oh_enc,
-            "hold_piece": hold_piece_oh_enc,
-            "level": np.array([self.tetris.level], dtype=np.float32),
-            "board": (board != 0).astype(np.float32).flatten(),
-        }
-        return obs
+        fields = self._obs_fields
+        self._write_one_hot("piece_type", TYPE_INDEX[tetris.figure.type])
+        self._write_one_hot("rotation", tetris.figure.rotation)
+        self._write_one_hot("next_piece", TYPE_INDEX[tetris.next.type])
+        hold = TYPE_INDEX[tetris.hold.type] if tetris.hold is not None else None
+        self._write_one_hot("hold_piece", hold)
+        fields["x"][0] = tetris.figure.x
+        fields["y"][0] = tetris.figure.y
+        fields["ticks_to_gravity"][0] = min(
+            max(self.next_gravity_frame - self.frame, 0), self.base_fall_interval
+        )
+        fields["level"][0] = tetris.level
+        if self._obs_written.get("board") != tetris.pieces_placed:
+            tetris.occupancy(out=self._obs_board)
+            self._obs_written["board"] = tetris.pieces_placed
+
+        if self.observation_mode == "flat":
+            return self._obs
+        return fields
 
     def reset(self, *, seed=None, options=None):
         super().reset(seed=seed, options=options)
-        self.tetris = Tetris(ROWS, COLS, seed)
+        if seed is None:
+            # Unseeded resets continue the sequence of the last seeded one.
+            seed = int(self.np_random.integers(2**63))
+        self.episode_seed = seed
+        if self.recorder is not None:
+            # Log the episode in progress before its game is replaced.
+            self.recorder.end(self)
+        self._new_engine(seed)
 
         self.bumpiness = 0
         self.height = 0
@@ -139,22 +262,67 @@ class TetrisEnv(gym.Env):
 
         self.steps_until_truncated = 35
         self.steps_without_scoring = 0
+        self._new_observation()
         obs = self._get_observation()
+        from_snapshot = bool(options and "snapshot" in options)
+        if from_snapshot:
+            obs = self.restore(options["snapshot"])
+        if self.recorder is not None:
+            self.recorder.begin(self, from_snapshot)
 
         info = {}
         return obs, info
 
-    def step(self, action):
-
-        bumpiness_p = self.bumpiness
-        hole_count_p = self.hole_count
-        score_p = self.score
-        height_p = self.height
-        level_p = self.level
-
+    def _new_engine(self, seed):
+        self.tetris = self.engine(ROWS, COLS, seed)
+        if self.profiler is not None:
+            self.profiler.wrap(self.tetris, "place_figure", "lock")
+            self.profiler.wrap(self.tetris, "remove_line", "lock")
+            self.profiler.wrap(self.tetris, "update_stats", "metrics")
+
+    def snapshot(self):
+        """Pack the game and the env's gravity and reward state into bytes.
+
+        Pass the result to `restore`, or to `reset(options={"snapshot": ...})`,
+        to continue from exactly this point.
+        """
+        header = ENV_SNAPSHOT_HEADER.pack(
+            self.frame,
+            self.next_gravity_frame,
+            self.fall_interval,
+            self.bumpiness,
+            self.height,
+            self.hole_count,
+            self.score,
+            self.level,
+            self.steps_without_scoring,
+            self.steps_until_truncated,
+        )
+        return header + self.tetris.snapshot()
+
+    def restore(self, snapshot):
+        """Return to the state recorded by `snapshot`; return the observation."""
+        (
+            self.frame,
+            self.next_gravity_frame,
+            self.fall_interval,
+            self.bumpiness,
+            self.height,
+            self.hole_count,
+            self.score,
+            self.level,
+            self.steps_without_scoring,
+            self.steps_until_truncated,
+        ) = ENV_SNAPSHOT_HEADER.unpack_from(snapshot)
+        if getattr(self, "tetris", None) is None:
+            self._new_engine(None)
+        self.tetris.restore(snapshot[ENV_SNAPSHOT_HEADER.size :])
+        self._placements_key = None
+        self._new_observation()
+        return self._get_observation()
+
+    def _act(self, action):
         freezed = False
-        reward = 0.0
-
         if action == LEFT:
             self.tetris.go_side(-1)
         elif action == RIGHT:
@@ -170,14 +338,132 @@ class TetrisEnv(gym.Env):
             pass
 
         if not freezed and self.frame >= self.next_gravity_frame:
-            freezed = self.tetris.go_down()
-            self.next_gravity_frame += self.fall_interval
+            freezed = self._gravity()
 
+        self.frame += 1
+        return freezed
+
+    def _act_repeated(self, action):
+        # Repeat the action for up to `action_repeat` frames, stopping once a
+        # piece locks or the game ends so the agent sees every new piece.
+        # With `skip_idle`, NONE jumps straight to the next gravity tick: the
+        # frames before it would change nothing.
+        tetris = self.tetris
+        pieces = tetris.pieces_placed
+        freezed = False
+        for _ in range(self.action_repeat):
+            if action == NONE and self.skip_idle:
+                self.frame = max(self.frame, self.next_gravity_frame)
+            freezed = self._act(action)
+            if freezed or tetris.gameover or tetris.pieces_placed != pieces:
+                break
+        return freezed
+
+    def _gravity(self):
+        freezed = self.tetris.go_down()
+        self.next_gravity_frame += self.fall_interval
+        return freezed
+
+    def get_profile(self):
+        """Return per-phase call counts and exclusive times, or {} when off.
+
+        Phases are "action" (moving the piece), "gravity", "lock" (placing
+        the piece and clearing lines), "metrics" (board statistics),
+        "reward", "observation" and "step" (the rest of `step`).
+        """
+        if self.profiler is None:
+            return {}
+        return self.profiler.stats()
+
+    def reset_profile(self):
+        if self.profiler is not None:
+            self.profiler.reset()
+
+    def legal_placements(self):
+        """Map each legal placement action to its (rotation, x) placement."""
+        tetris = self.tetris
+        figure = tetris.figure
+        # Cached per piece so action_masks and step share one enumeration.
+        key = (
+            tetris,
+            tetris.pieces_placed,
+            figure,
+            figure.rotation,
+            figure.x,
+            figure.y,
+        )
+        if self._placements_key != key:
+            self._placements = {
+                placement_action(figure.type, rotation, x): (rotation, x)
+                for rotation, x, _ in tetris.placements()
+            }
+            self._placements_key = key
+        return self._placements
+
+    def action_masks(self):
+        masks = np.zeros(self.action_space.n, dtype=bool)
+        if self.action_mode == "frame":
+            masks[:] = True
+        else:
+            masks[list(self.legal_placements())] = True
+            masks[HOLD] = self.tetris.allow_hold
+        if not masks.any():
+            # A piece swapped in on top of the stack has nowhere to go; every
+            # action drops it where it is.
+            masks[:] = True
+        return masks
+
+    def _place(self, action):
+        if action == HOLD and self.tetris.allow_hold:
+            self.tetris.hold_piece()
+            return False
+        placement = self.legal_placements().get(int(action))
+        if placement is None:
+            # Unreachable placements and blocked holds drop the piece where
+            # it is.
+            self.tetris.hard_drop()
+        else:
+            self.tetris.place(*placement)
+        return True
+
+    def step(self, action):
+        previous = (self.bumpiness, self.hole_count, self.score, self.height)
+        level_p = self.level
+
+        frame = self.frame
+
+        if self.action_mode == "placement":
+            freezed = self._place(action)
+        elif self.macro_step:
+            freezed = self._act_repeated(action)
+        else:
+            freezed = self._act(action)
+        # Rewards only come from the lock (and game over) that ends a macro
+        # step, so scoring once at its end sums the rewards of its frames.
+        reward = self._reward(freezed, *previous)
+
+        terminated = self.tetris.gameover
+        truncated = self.steps_without_scoring >= self.steps_until_truncated
+
+        if self.level != level_p and self.level <= 5:
+            self.fall_interval = self.base_fall_interval - 4 * (self.level - 1)
+
+        obs = self._get_observation()
+        if self.recorder is not None:
+            self.recorder.record(self, action, terminated or truncated)
+
+        info = {}
+        if self.macro_step:
+            info["frames"] = self.frame - frame
+        return obs, reward, terminated, truncated, info
+
+    def _reward(self, freezed, bumpiness_p, hole_count_p, score_p, height_p):
+        reward = 0.0
         if freezed:
             self.level = self.tetris.level
-            self.bumpiness = get_bumpiness(self.tetris.board)
-            self.height = get_max_height(self.tetris.board)
-            self.hole_count = get_blocked_cells(self.tetris.board)
+            self.bumpiness = self.tetris.bumpiness
+            self.height = self.tetris.max_height
+            self.hole_count = self.tetris.holes
             self.score = self.tetris.score
 
             line_bonus = [0.0, 1.0, 3.0, 5.0, 8.0][self.score - score_p]
@@ -190,119 +476,28 @@ class TetrisEnv(gym.Env):
             reward += -1.0 * (self.hole_count - hole_count_p)
             reward += -0.5 * (self.height - height_p)
 
-
-        terminated = self.tetris.gameover
-        truncated = self.steps_without_scoring >= self.steps_until_truncated
-
         if self.tetris.gameover:
             reward -= 5
 
-        reward = float(np.clip(reward, -20.0, 20.0))
-
-        self.frame += 1
-
-        if self.level != level_p and self.level <= 5:
-            self.fall_interval = self.base_fall_interval - 4 * (self.level - 1)
-
-        obs = self._get_observation()
-
-        info = {}
-        return obs, reward, terminated, truncated, info
+        return float(np.clip(reward, -20.0, 20.0))
 
     def render(self):
         tetris = self.tetris
+        if self.render_mode == "rgb_array":
+            return self.raster.render(tetris).copy()
         if self.render_mode == "human":
-            self.win.fill(BLACK)
-            for x in range(ROWS):
-                for y in range(COLS):
-                    if tetris.board[x][y] > 0:
-                        val = tetris.board[x][y]
-                        img = self.Assets[val]
-                        self.win.blit(img, (y * CELLSIZE, x * CELLSIZE))
-                        pygame.draw.rect(
-                            self.win,
-                            WHITE,
-                            (y * CELLSIZE, x * CELLSIZE, CELLSIZE, CELLSIZE),
-                            1,
-                        )
-
-            if tetris.figure:
-                for i in range(4):
-                    for j in range(4):
-                        if i * 4 + j in tetris.figure.image():
-                            img = self.Assets[tetris.figure.color]
-                            x = CELLSIZE * (tetris.figure.x + j)
-                            y = CELLSIZE * (tetris.figure.y + i)
-                            self.win.blit(img, (x, y))
-                            pygame.draw.rect(
-                                self.win, WHITE, (x, y, CELLSIZE, CELLSIZE), 1
-                            )
-
-            ghost_cells = tetris.project_landing()
-            for row, col in ghost_cells:
-                ghost_rect = pygame.Rect(
-                    col * CELLSIZE, row * CELLSIZE, CELLSIZE, CELLSIZE
-                )
-                pygame.draw.rect(self.win, WHITE, ghost_rect, 1)
-
-            if tetris.gameover:
-                rect = pygame.Rect((50, 140, WIDTH - 100, HEIGHT - 350))
-                pygame.draw.rect(self.win, BLACK, rect)
-                pygame.draw.rect(self.win, RED, rect, 2)
-
-                over = self.font2.render("Game Over", True, WHITE)
-
-                self.win.blit(over, (rect.centerx - over.get_width() / 2, rect.y + 20))
-
-            # HUD ********************************************************************
-
-            hud_top = HEIGHT - HUD_HEIGHT
-            pygame.draw.rect(self.win, BLUE, (0, hud_top, WIDTH, HUD_HEIGHT))
-            preview_margin_x = CELLSIZE
-            next_origin_y = hud_top + 10
-            hold_origin_y = next_origin_y + 4 * CELLSIZE + 20
-
-            if tetris.next:
-                next_image = tetris.next.image()
-                img = self.Assets[tetris.next.color]
-                base_x = preview_margin_x
-                for idx in next_image:
-                    row, col = divmod(idx, 4)
-                    x = base_x + col * CELLSIZE
-                    y = next_origin_y + row * CELLSIZE
-                    self.win.blit(img, (x, y))
-
-            if tetris.hold:
-                hold_image = tetris.hold.image()
-                img = self.Assets[tetris.hold.color]
-                base_x = preview_margin_x
-                for idx in hold_image:
-                    row, col = divmod(idx, 4)
-                    x = base_x + col * CELLSIZE
-                    y = hold_origin_y + row * CELLSIZE
-                    self.win.blit(img, (x, y))
-
-            scoreimg = self.font.render(f"{tetris.score}", True, WHITE)
-            levelimg = self.font2.render(f"Level : {tetris.level}", True, WHITE)
-            self.win.blit(
-                scoreimg,
-                (WIDTH // 2 - scoreimg.get_width() // 2 + WIDTH // 4, hud_top + 10),
-            )
-            self.win.blit(
-                levelimg,
-                (
-                    WIDTH // 2 - levelimg.get_width() // 2 + WIDTH // 4,
-                    hud_top + HUD_HEIGHT - levelimg.get_height() - 10,
-                ),
-            )
-
-            pygame.draw.rect(self.win, BLUE, (0, 0, WIDTH, hud_top), 2)
+            import pygame
+
             pygame.event.pump()
             self.clock.tick(FPS)
-            pygame.display.update()
+            pygame.display.update(self.view.draw(tetris))
 
     def close(self):
+        if self.recorder is not None:
+            self.recorder.end(self)
         if self.render_mode == "human":
+            import pygame
+
             pygame.quit()
             pygame.display.quit()
         return super().close()
@@ -0,0 +1,75 @@
+import pygame
+
+from tetris import COLS, FPS, ROWS, SCREEN, Tetris
+from tetris_render import PygameRenderer
+
+
+def main():
+    pygame.init()
+    win = pygame.display.set_mode(SCREEN, pygame.NOFRAME)
+    clock = pygame.time.Clock()
+
+    view = PygameRenderer(win, ("Game Over", "Press r to restart", "Press q to quit"))
+
+    counter = 0
+    move_down = False
+    can_move = True
+
+    tetris = Tetris(ROWS, COLS)
+
+    running = True
+    while running:
+        counter += 1
+        if counter >= 10000:
+            counter = 0
+
+        if can_move:
+            if counter % (FPS // (tetris.level * 2)) == 0 or move_down:
+                if not tetris.gameover:
+                    tetris.go_down()
+
+        # EVENT HANDLING *********************************************************
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            if event.type == pygame.KEYDOWN:
+                if can_move and not tetris.gameover:
+                    if event.key == pygame.K_LEFT:
+                        tetris.go_side(-1)
+
+                    if event.key == pygame.K_RIGHT:
+                        tetris.go_side(1)
+
+                    if event.key == pygame.K_UP:
+                        tetris.rotate()
+
+                    if event.key == pygame.K_DOWN:
+                        move_down = True
+
+                    if event.key == pygame.K_SPACE:
+                        tetris.hard_drop()
+
+                if event.key == pygame.K_c:
+                    tetris.hold_piece()
+
+                if event.key == pygame.K_r:
+                    tetris.__init__(ROWS, COLS)
+
+                if event.key == pygame.K_p:
+                    can_move = not can_move
+
+                if event.key == pygame.K_q or event.key == pygame.K_ESCAPE:
+                    running = False
+
+            if event.type == pygame.KEYUP:
+                if event.key == pygame.K_DOWN:
+                    move_down = False
+
+        clock.tick(FPS)
+        pygame.display.update(view.draw(tetris))
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
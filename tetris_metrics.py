@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def get_blocked_cells(board):
     count = 0
     for col in range(len(board[0])):
@@ -44,3 +47,111 @@ def get_column_height(col, board):
         if board[r][col] != 0:
             return rows - r
     return 0
+
+
+# BATCHED ********************************************************************
+# NumPy versions of the metrics above for a (N, rows, cols) stack of boards.
+# Each returns one value per board and matches its single-board counterpart.
+
+
+def batch_column_heights(boards):
+    filled = np.asarray(boards) != 0
+    rows = filled.shape[1]
+    return np.where(filled.any(axis=1), rows - filled.argmax(axis=1), 0)
+
+
+def batch_aggregate_height(boards):
+    return batch_column_heights(boards).sum(axis=1)
+
+
+def batch_bumpiness(boards):
+    return np.abs(np.diff(batch_column_heights(boards), axis=1)).sum(axis=1)
+
+
+def batch_max_height(boards):
+    filled = np.asarray(boards) != 0
+    empty_from_bottom = ~filled.any(axis=2)[:, ::-1]
+    return np.where(
+        empty_from_bottom.any(axis=1),
+        empty_from_bottom.argmax(axis=1),
+        filled.shape[1] - 1,
+    )
+
+
+def batch_blocked_cells(boards):
+    filled = np.asarray(boards) != 0
+    return batch_column_heights(filled).sum(axis=1) - filled.sum(axis=(1, 2))
+
+
+def batch_row_transitions(boards):
+    # Filled/empty changes along each row, with both walls counted as filled.
+    filled = np.asarray(boards) != 0
+    walled = np.pad(filled, ((0, 0), (0, 0), (1, 1)), constant_values=True)
+    return (walled[:, :, 1:] != walled[:, :, :-1]).sum(axis=(1, 2))
+
+
+def batch_column_transitions(boards):
+    # Filled/empty changes down each column, with the floor counted as filled.
+    filled = np.asarray(boards) != 0
+    floored = np.pad(filled, ((0, 0), (0, 1), (0, 0)), constant_values=True)
+    return (floored[:, 1:] != floored[:, :-1]).sum(axis=(1, 2))
+
+
+def batch_wells(boards):
+    # Dellacherie's well sums: an empty cell walled in on both sides is part
+    # of a well, and each well of depth d adds 1 + 2 + ... + d. Counting, at
+    # every well cell, the run of well cells down to it adds exactly that.
+    filled = np.asarray(boards) != 0
+    walled = np.pad(filled, ((0, 0), (0, 0), (1, 1)), constant_values=True)
+    well = ~filled & walled[:, :, :-2] & walled[:, :, 2:]
+    count = np.cumsum(well, axis=1, dtype=np.int16)
+    run_start = np.maximum.accumulate(np.where(well, 0, count), axis=1)
+    return (count - run_start).sum(axis=(1, 2))
+
+
+def batch_landing_height(piece_rows, rows):
+    # Height of the middle of each placed piece, given the (N, 4) board rows
+    # its cells were locked into.
+    piece_rows = np.asarray(piece_rows)
+    return rows - (piece_rows.min(axis=1) + piece_rows.max(axis=1)) / 2
+
+
+def clear_lines(boards):
+    """Clear full rows in a (N, rows, cols) stack of boards.
+
+    Follows Tetris.remove_line: full rows below the top are cleared, and a
+    full top row only goes once something under it was cleared. Returns the
+    compacted boards and the number of rows cleared on each.
+    """
+    full = (boards != 0).all(axis=2)
+    cleared = full & full[:, 1:].any(axis=1, keepdims=True)
+    n_cleared = cleared.sum(axis=1)
+    order = np.argsort(~cleared, axis=1, kind="stable")
+    compacted = np.take_along_axis(boards, order[:, :, None], axis=1)
+    compacted[np.arange(boards.shape[1]) < n_cleared[:, None]] = 0
+    return compacted, n_cleared
+
+
+def batch_features(boards, piece_rows=None):
+    """Compute every batched metric for `boards` in one pass.
+
+    Returns a dict of (N,) arrays. `landing_height` is only included when
+    the rows of the last placed piece are given.
+    """
+    filled = np.asarray(boards) != 0
+    heights = batch_column_heights(filled)
+    features = {
+        "column_heights": heights,
+        "aggregate_height": heights.sum(axis=1),
+        "bumpiness": np.abs(np.diff(heights, axis=1)).sum(axis=1),
+        "max_height": batch_max_height(filled),
+        "blocked_cells": heights.sum(axis=1) - filled.sum(axis=(1, 2)),
+        "row_transitions": batch_row_transitions(filled),
+        "column_transitions": batch_column_transitions(filled),
+        "wells": batch_wells(filled),
+    }
+    if piece_rows is not None:
+        features["landing_height"] = batch_landing_height(
+            piece_rows, filled.shape[1]
+        )
+    return features
@@ -0,0 +1,60 @@
+from time import perf_counter
+
+
+class PhaseProfiler:
+    """Per-phase call counts and timings gathered by wrapping methods.
+
+    `wrap` replaces a bound method on one object with a timed version, so
+    nothing is measured (or paid for) on objects that were never wrapped.
+    Times are exclusive: a phase running inside another one, such as a line
+    clear inside a hard drop, is only counted for the inner phase. Re-entering
+    the phase that is already running (recursion) is not counted again.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+        self._stack = []
+
+    def wrap(self, obj, name, phase):
+        method = getattr(obj, name)
+        stack = self._stack
+        calls = self.calls
+        seconds = self.seconds
+        calls.setdefault(phase, 0)
+        seconds.setdefault(phase, 0.0)
+
+        def timed(*args, **kwargs):
+            if stack and stack[-1][0] == phase:
+                return method(*args, **kwargs)
+            # [phase, seconds spent in nested phases]
+            frame = [phase, 0.0]
+            stack.append(frame)
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                calls[phase] += 1
+                seconds[phase] += elapsed - frame[1]
+
+        setattr(obj, name, timed)
+
+    def reset(self):
+        for phase in self.calls:
+            self.calls[phase] = 0
+            self.seconds[phase] = 0.0
+
+    def stats(self):
+        """Return {phase: {"calls", "seconds", "mean_us"}}."""
+        return {
+            phase: {
+                "calls": calls,
+                "seconds": self.seconds[phase],
+                "mean_us": 1e6 * self.seconds[phase] / calls if calls else 0.0,
+            }
+            for phase, calls in self.calls.items()
+        }
@@ -0,0 +1,155 @@
+import numpy as np
+
+from tetris import (
+    BLACK,
+    BLUE,
+    CELLSIZE,
+    COLS,
+    HEIGHT,
+    HUD_HEIGHT,
+    RED,
+    ROWS,
+    WHITE,
+    WIDTH,
+)
+
+# 3x5 bitmap glyphs for the HUD and game-over text.
+GLYPHS = {
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "001", "001", "001"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+    "A": ("010", "101", "111", "101", "101"),
+    "E": ("111", "100", "110", "100", "111"),
+    "G": ("111", "100", "101", "101", "111"),
+    "L": ("100", "100", "100", "100", "111"),
+    "M": ("101", "111", "111", "101", "101"),
+    "O": ("111", "101", "101", "101", "111"),
+    "R": ("110", "101", "110", "101", "101"),
+    "V": ("101", "101", "101", "101", "010"),
+    ":": ("000", "010", "000", "010", "000"),
+    " ": ("000", "000", "000", "000", "000"),
+}
+
+
+def load_tile(path, background):
+    """Load a cell image as an RGB tile pre-blended onto `background`."""
+    from PIL import Image
+
+    rgba = np.asarray(Image.open(path).convert("RGBA"), dtype=np.float32)
+    alpha = rgba[..., 3:] / 255
+    tile = rgba[..., :3] * alpha + np.array(background) * (1 - alpha)
+    return tile.round().astype(np.uint8)
+
+
+def outline(tile, color=WHITE):
+    tile = tile.copy()
+    tile[0, :] = tile[-1, :] = tile[:, 0] = tile[:, -1] = color
+    return tile
+
+
+class RgbRenderer:
+    """Rasterizes a `Tetris` game into a reusable RGB NumPy frame.
+
+    Cell tiles from `Assets/` are loaded and pre-composited once, so drawing a
+    frame is a handful of array copies: no display, no pygame and no frame
+    rate cap.
+    """
+
+    def __init__(self):
+        self.frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        board_tiles = [np.full((CELLSIZE, CELLSIZE, 3), BLACK, dtype=np.uint8)]
+        self.hud_tiles = {}
+        for color in range(1, 5):
+            path = f"Assets/{color}.png"
+            board_tiles.append(outline(load_tile(path, BLACK)))
+            self.hud_tiles[color] = load_tile(path, BLUE)
+        self.board_tiles = np.stack(board_tiles)
+        self.cells = np.empty((ROWS, COLS, CELLSIZE, CELLSIZE, 3), dtype=np.uint8)
+        self.glyphs = {}
+
+    def glyph(self, char, scale):
+        key = (char, scale)
+        if key not in self.glyphs:
+            bitmap = np.array([[bit == "1" for bit in row] for row in GLYPHS[char]])
+            self.glyphs[key] = bitmap.repeat(scale, axis=0).repeat(scale, axis=1)
+        return self.glyphs[key]
+
+    def text(self, text, center_x, top, scale, color):
+        width = (4 * len(text) - 1) * scale
+        x = center_x - width // 2
+        for char in text:
+            mask = self.glyph(char, scale)
+            # Clip glyphs that would run off the frame.
+            left = max(x, 0)
+            right = min(x + mask.shape[1], WIDTH)
+            if left < right:
+                region = self.frame[top : top + mask.shape[0], left:right]
+                region[mask[:, left - x : right - x]] = color
+            x += 4 * scale
+
+    def rect(self, x, y, w, h, color, width=0):
+        frame = self.frame
+        if width == 0:
+            frame[y : y + h, x : x + w] = color
+            return
+        frame[y : y + width, x : x + w] = color
+        frame[y + h - width : y + h, x : x + w] = color
+        frame[y : y + h, x : x + width] = color
+        frame[y : y + h, x + w - width : x + w] = color
+
+    def preview(self, piece, origin_y):
+        tile = self.hud_tiles[piece.color]
+        for dy, dx in piece.cells():
+            x = CELLSIZE + dx * CELLSIZE
+            y = origin_y + dy * CELLSIZE
+            self.frame[y : y + CELLSIZE, x : x + CELLSIZE] = tile
+
+    def render(self, tetris):
+        """Draw `tetris` into `self.frame` and return it."""
+        frame = self.frame
+        np.take(self.board_tiles, tetris.board, axis=0, out=self.cells)
+        playfield = frame[: ROWS * CELLSIZE].reshape(ROWS, CELLSIZE, COLS, CELLSIZE, 3)
+        playfield[:] = self.cells.transpose(0, 2, 1, 3, 4)
+
+        figure = tetris.figure
+        if figure:
+            tile = self.board_tiles[figure.color]
+            for dy, dx in figure.cells():
+                if figure.y + dy >= 0:
+                    x = CELLSIZE * (figure.x + dx)
+                    y = CELLSIZE * (figure.y + dy)
+                    frame[y : y + CELLSIZE, x : x + CELLSIZE] = tile
+
+        for row, col in tetris.project_landing():
+            if row >= 0:
+                self.rect(col * CELLSIZE, row * CELLSIZE, CELLSIZE, CELLSIZE, WHITE, 1)
+
+        if tetris.gameover:
+            x, y, w, h = 50, 140, WIDTH - 100, HEIGHT - 350
+            self.rect(x, y, w, h, BLACK)
+            self.rect(x, y, w, h, RED, 2)
+            self.text("GAME OVER", x + w // 2, y + 20, 2, WHITE)
+
+        # HUD ****************************************************************
+
+        hud_top = HEIGHT - HUD_HEIGHT
+        self.rect(0, hud_top, WIDTH, HUD_HEIGHT, BLUE)
+        next_origin_y = hud_top + 10
+        if tetris.next:
+            self.preview(tetris.next, next_origin_y)
+        if tetris.hold:
+            self.preview(tetris.hold, next_origin_y + 4 * CELLSIZE + 20)
+
+        hud_x = WIDTH // 2 + WIDTH // 4
+        self.text(f"{tetris.score}", hud_x, hud_top + 10, 6, WHITE)
+        self.text(f"LEVEL : {tetris.level}", hud_x, hud_top + HUD_HEIGHT - 20, 2, WHITE)
+
+        self.rect(0, 0, WIDTH, hud_top, BLUE, 2)
+        return frame
@@ -0,0 +1,180 @@
+import pygame
+
+from tetris import (
+    BLACK,
+    BLUE,
+    CELLSIZE,
+    COLS,
+    HEIGHT,
+    HUD_HEIGHT,
+    RED,
+    ROWS,
+    WHITE,
+    WIDTH,
+)
+
+HUD_TOP = HEIGHT - HUD_HEIGHT
+GAMEOVER_RECT = pygame.Rect(50, 140, WIDTH - 100, HEIGHT - 350)
+# Text surfaces kept per font before the cache is dropped.
+TEXT_CACHE_SIZE = 64
+
+
+def piece_key(piece):
+    if not piece:
+        return None
+    return piece.type, piece.rotation, piece.color
+
+
+def cell_rect(row, col):
+    return pygame.Rect(col * CELLSIZE, row * CELLSIZE, CELLSIZE, CELLSIZE)
+
+
+class PygameRenderer:
+    """Draws a `Tetris` game onto a pygame display surface incrementally.
+
+    Locked cells live on a cached playfield layer that is patched row by row
+    when the board changes, cell tiles are composited and outlined once, and
+    text is rendered only when it changes. `draw` only repaints the cells the
+    falling piece and its ghost left or entered, changed board rows, and the
+    HUD when the score, level or previews change, and returns those
+    rectangles for `pygame.display.update`.
+    """
+
+    def __init__(self, surface, gameover_lines=("Game Over",)):
+        self.surface = surface
+        self.gameover_lines = gameover_lines
+        self.font = pygame.font.Font("Fonts/Alternity-8w7J.ttf", 50)
+        self.font2 = pygame.font.SysFont("cursive", 25)
+        self.texts = {self.font: {}, self.font2: {}}
+
+        self.tiles = [self.tile(None, BLACK, outline=False)]
+        self.hud_tiles = {}
+        for color in range(1, 5):
+            image = pygame.image.load(f"Assets/{color}.png")
+            self.tiles.append(self.tile(image, BLACK, outline=True))
+            self.hud_tiles[color] = self.tile(image, BLUE, outline=False)
+
+        self.playfield = pygame.Surface((WIDTH, HUD_TOP)).convert(surface)
+        self.playfield.fill(BLACK)
+        self.board = [[0] * COLS for _ in range(ROWS)]
+        self.invalidate()
+
+    def tile(self, image, background, outline):
+        tile = pygame.Surface((CELLSIZE, CELLSIZE)).convert(self.surface)
+        tile.fill(background)
+        if image is not None:
+            tile.blit(image, (0, 0))
+        if outline:
+            pygame.draw.rect(tile, WHITE, (0, 0, CELLSIZE, CELLSIZE), 1)
+        return tile
+
+    def text(self, font, text, color):
+        cache = self.texts[font]
+        key = (text, color)
+        if key not in cache:
+            if len(cache) >= TEXT_CACHE_SIZE:
+                cache.clear()
+            cache[key] = font.render(text, True, color)
+        return cache[key]
+
+    def invalidate(self):
+        """Repaint the whole window on the next `draw`."""
+        self.full = True
+        self.figure_key = self.hud_key = None
+        self.gameover = False
+        self.piece_cells, self.ghost_cells = [], []
+
+    def draw(self, tetris):
+        """Bring the surface up to date with `tetris`; return the dirty rects."""
+        surface = self.surface
+        dirty = []
+
+        for row, (cells, cached) in enumerate(zip(tetris.board, self.board)):
+            if cells != cached:
+                self.board[row] = cells[:]
+                y = row * CELLSIZE
+                for col, value in enumerate(cells):
+                    self.playfield.blit(self.tiles[value], (col * CELLSIZE, y))
+                dirty.append(pygame.Rect(0, y, WIDTH, CELLSIZE))
+
+        figure = tetris.figure
+        figure_key = figure and (piece_key(figure), figure.x, figure.y)
+        if dirty or self.full or figure_key != self.figure_key:
+            old_cells = self.piece_cells + self.ghost_cells
+            self.figure_key = figure_key
+            self.piece_cells = self.ghost_cells = []
+            if figure:
+                self.piece_cells = [
+                    (figure.y + dy, figure.x + dx) for dy, dx in figure.cells()
+                ]
+                self.ghost_cells = tetris.project_landing()
+            for row, col in old_cells + self.piece_cells + self.ghost_cells:
+                if row >= 0:
+                    dirty.append(cell_rect(row, col))
+
+        if tetris.gameover != self.gameover:
+            self.gameover = tetris.gameover
+            dirty.append(GAMEOVER_RECT)
+        if self.full:
+            dirty = [pygame.Rect(0, 0, WIDTH, HUD_TOP)]
+
+        if dirty:
+            for rect in dirty:
+                surface.blit(self.playfield, rect, rect)
+            if figure:
+                tile = self.tiles[figure.color]
+                for row, col in self.piece_cells:
+                    surface.blit(tile, (col * CELLSIZE, row * CELLSIZE))
+            for row, col in self.ghost_cells:
+                pygame.draw.rect(surface, WHITE, cell_rect(row, col), 1)
+            if tetris.gameover:
+                self.draw_gameover()
+            pygame.draw.rect(surface, BLUE, (0, 0, WIDTH, HUD_TOP), 2)
+
+        hud_key = (tetris.score, tetris.level, piece_key(tetris.next))
+        hud_key += (piece_key(tetris.hold),)
+        if hud_key != self.hud_key:
+            self.hud_key = hud_key
+            self.draw_hud(tetris)
+            dirty.append(pygame.Rect(0, HUD_TOP, WIDTH, HUD_HEIGHT))
+
+        self.full = False
+        return dirty
+
+    def draw_gameover(self):
+        surface = self.surface
+        rect = GAMEOVER_RECT
+        pygame.draw.rect(surface, BLACK, rect)
+        pygame.draw.rect(surface, RED, rect, 2)
+        for i, line in enumerate(self.gameover_lines):
+            # The first line is the title; the rest are hints below it.
+            image = self.text(self.font2, line, RED if i else WHITE)
+            y = rect.y + 20 if i == 0 else rect.y + 50 + 30 * i
+            surface.blit(image, (rect.centerx - image.get_width() / 2, y))
+
+    def draw_hud(self, tetris):
+        surface = self.surface
+        pygame.draw.rect(surface, BLUE, (0, HUD_TOP, WIDTH, HUD_HEIGHT))
+        next_origin_y = HUD_TOP + 10
+        for piece, origin_y in (
+            (tetris.next, next_origin_y),
+            (tetris.hold, next_origin_y + 4 * CELLSIZE + 20),
+        ):
+            if piece:
+                tile = self.hud_tiles[piece.color]
+                for dy, dx in piece.cells():
+                    surface.blit(
+                        tile, (CELLSIZE + dx * CELLSIZE, origin_y + dy * CELLSIZE)
+                    )
+
+        scoreimg = self.text(self.font, f"{tetris.score}", WHITE)
+        levelimg = self.text(self.font2, f"Level : {tetris.level}", WHITE)
+        hud_x = WIDTH // 2 + WIDTH // 4
+        surface.blit(scoreimg, (hud_x - scoreimg.get_width() // 2, HUD_TOP + 10))
+        surface.blit(
+            levelimg,
+            (
+                hud_x - levelimg.get_width() // 2,
+                HUD_TOP + HUD_HEIGHT - levelimg.get_height() - 10,
+            ),
+        )
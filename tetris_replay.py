@@ -0,0 +1,217 @@
+import argparse
+import struct
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from tetris_env import TetrisEnv
+
+MAGIC = b"TREP"
+VERSION = 1
+ACTION_MODES = ("frame", "placement")
+# Record prefix: magic and the size of the record body that follows.
+PREFIX = struct.Struct("<4sI")
+# Body header: version, action mode, base fall interval, seed, number of
+# actions, number of checkpoints, lines cleared, pieces placed, the action
+# repeat and whether idle frames were skipped.
+HEADER = struct.Struct("<BBHqIIIIB?")
+# Each checkpoint: the step it was taken after and the snapshot size.
+CHECKPOINT = struct.Struct("<IH")
+
+Episode = namedtuple(
+    "Episode",
+    "seed action_mode base_fall_interval actions checkpoints lines pieces "
+    "action_repeat skip_idle",
+)
+
+
+class EpisodeRecorder:
+    """Appends the episodes a `TetrisEnv` plays to a binary log.
+
+    An episode is stored as its seed, one byte per action and an env
+    snapshot every `checkpoint_every` steps (and at step 0 when the episode
+    started from a snapshot rather than a seed). Records are only ever
+    appended, one write per episode, when it ends or the env is reset or
+    closed.
+    """
+
+    def __init__(self, path, checkpoint_every=1000):
+        self.path = Path(path)
+        self.checkpoint_every = checkpoint_every
+        self.actions = None
+
+    def begin(self, env, from_snapshot=False):
+        """Start recording the episode `env` was just reset to.
+
+        The env must `end` the previous episode before it replaces the game.
+        """
+        self.seed = env.episode_seed
+        self.actions = bytearray()
+        self.checkpoints = [(0, env.snapshot())] if from_snapshot else []
+
+    def record(self, env, action, done):
+        actions = self.actions
+        actions.append(int(action))
+        if len(actions) % self.checkpoint_every == 0:
+            self.checkpoints.append((len(actions), env.snapshot()))
+        if done:
+            self.end(env)
+
+    def end(self, env):
+        """Append the episode in progress, if any, to the log."""
+        if self.actions is None:
+            return
+        parts = [
+            HEADER.pack(
+                VERSION,
+                ACTION_MODES.index(env.action_mode),
+                env.base_fall_interval,
+                self.seed,
+                len(self.actions),
+                len(self.checkpoints),
+                env.tetris.score,
+                env.tetris.pieces_placed,
+                env.action_repeat,
+                env.skip_idle,
+            ),
+            bytes(self.actions),
+        ]
+        for step, snapshot in self.checkpoints:
+            parts.append(CHECKPOINT.pack(step, len(snapshot)))
+            parts.append(snapshot)
+        body = b"".join(parts)
+        with open(self.path, "ab") as log:
+            log.write(PREFIX.pack(MAGIC, len(body)) + body)
+        self.actions = None
+
+
+def read_episodes(path):
+    """Return every `Episode` in the log at `path`, in recording order."""
+    data = Path(path).read_bytes()
+    episodes = []
+    offset = 0
+    while offset < len(data):
+        magic, size = PREFIX.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an episode log (offset {offset})")
+        offset += PREFIX.size
+        body = data[offset : offset + size]
+        offset += size
+
+        (
+            version,
+            mode,
+            base_fall_interval,
+            seed,
+            n_actions,
+            n_checkpoints,
+            lines,
+            pieces,
+            action_repeat,
+            skip_idle,
+        ) = HEADER.unpack_from(body)
+        if version != VERSION:
+            raise ValueError(f"Unsupported episode log version {version}")
+        start = HEADER.size
+        actions = body[start : start + n_actions]
+        start += n_actions
+        checkpoints = {}
+        for _ in range(n_checkpoints):
+            step, length = CHECKPOINT.unpack_from(body, start)
+            start += CHECKPOINT.size
+            checkpoints[step] = body[start : start + length]
+            start += length
+        episodes.append(
+            Episode(
+                seed,
+                ACTION_MODES[mode],
+                base_fall_interval,
+                actions,
+                checkpoints,
+                lines,
+                pieces,
+                action_repeat,
+                skip_idle,
+            )
+        )
+    return episodes
+
+
+def replay(episode, frame=None, engine="bitboard", render_mode=None):
+    """Return a `TetrisEnv` positioned `frame` steps into `episode`.
+
+    Starts from the last checkpoint at or before `frame` (or from the seed)
+    and re-simulates the recorded actions from there. `frame` defaults to the
+    end of the episode.
+    """
+    frame = len(episode.actions) if frame is None else frame
+    env = TetrisEnv(
+        render_mode=render_mode,
+        base_fall_interval=episode.base_fall_interval,
+        engine=engine,
+        action_mode=episode.action_mode,
+        action_repeat=episode.action_repeat,
+        skip_idle=episode.skip_idle,
+    )
+    start = max((step for step in episode.checkpoints if step <= frame), default=None)
+    if start is None:
+        env.reset(seed=episode.seed)
+        start = 0
+    else:
+        env.reset(options={"snapshot": episode.checkpoints[start]})
+    for action in episode.actions[start:frame]:
+        env.step(action)
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay episode logs.")
+    parser.add_argument("log", type=Path)
+    parser.add_argument("--episode", type=int, help="index of the episode to show")
+    parser.add_argument("--frame", type=int, help="step to jump to (default: start)")
+    parser.add_argument("--save", type=Path, help="save the frame as a PNG")
+    parser.add_argument("--render", action="store_true", help="watch from --frame")
+    args = parser.parse_args()
+
+    episodes = read_episodes(args.log)
+    if args.episode is None:
+        # Re-simulate everything and check it ends where it was recorded.
+        steps = mismatches = 0
+        start = time.perf_counter()
+        for i, episode in enumerate(episodes):
+            env = replay(episode)
+            steps += len(episode.actions)
+            ok = (env.tetris.score, env.tetris.pieces_placed) == (
+                episode.lines,
+                episode.pieces,
+            )
+            mismatches += not ok
+            print(
+                f"{i}: seed {episode.seed}, {len(episode.actions)} steps, "
+                f"{episode.lines} lines, {episode.pieces} pieces"
+                + ("" if ok else " (replay differs)")
+            )
+        seconds = time.perf_counter() - start
+        print(f"replayed {steps} steps at {steps / seconds:.0f} steps/s")
+        if mismatches:
+            raise SystemExit(f"{mismatches} episode(s) did not replay identically")
+        return
+
+    episode = episodes[args.episode]
+    frame = args.frame or 0
+    if args.save:
+        from PIL import Image
+
+        env = replay(episode, frame, render_mode="rgb_array")
+        Image.fromarray(env.render()).save(args.save)
+    if args.render:
+        env = replay(episode, frame, render_mode="human")
+        env.render()
+        for action in episode.actions[frame:]:
+            env.step(action)
+            env.render()
+        env.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnv
+
+from tetris_vec_env import TetrisVecEnv
+
+
+def _attach(spec):
+    # `spec` is (shared memory name, shape, dtype) of an array made by
+    # `SubprocTetrisVecEnv`.
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(remote, parent_remote, num_envs, env_kwargs, specs, games):
+    parent_remote.close()
+    env = TetrisVecEnv(num_envs, **env_kwargs)
+    blocks, buffers = {}, {}
+    for key, spec in specs.items():
+        blocks[key], array = _attach(spec)
+        buffers[key] = array[games]
+    obs_buffers = {key: buffers[key] for key in env.observation_space.spaces}
+
+    def write_obs(obs):
+        for key, buffer in obs_buffers.items():
+            buffer[:] = obs[key]
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                env.step_async(buffers["actions"])
+                obs, rewards, dones, infos = env.step_wait()
+                write_obs(obs)
+                buffers["rewards"][:] = rewards
+                buffers["dones"][:] = dones
+                # Only infos of finished games carry anything worth sending.
+                remote.send({i: infos[i] for i in np.flatnonzero(dones)})
+            elif cmd == "reset":
+                env._seeds = data
+                write_obs(env.reset())
+                remote.send(None)
+            elif cmd == "get_attr":
+                remote.send(env.get_attr(*data))
+            elif cmd == "set_attr":
+                remote.send(env.set_attr(*data))
+            elif cmd == "env_method":
+                name, args, kwargs, local = data
+                remote.send(env.env_method(name, *args, indices=local, **kwargs))
+            elif cmd == "close":
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        buffers = obs_buffers = None
+        for shm in blocks.values():
+            shm.close()
+        remote.close()
+
+
+class SubprocTetrisVecEnv(VecEnv):
+    """`TetrisVecEnv` games spread over worker processes.
+
+    Each of the `n_workers` processes hosts one `TetrisVecEnv` of
+    `envs_per_worker` games. Game `i` lives on worker `i // envs_per_worker`.
+
+    Actions, observations, rewards and done flags are exchanged through
+    `multiprocessing.shared_memory` arrays that each worker reads and writes
+    its own slice of, so a step only sends a short command down each pipe.
+    Infos come back over the pipe, and only for games that just finished.
+    """
+
+    def __init__(self, n_workers, envs_per_worker, start_method=None, **env_kwargs):
+        self.n_workers = n_workers
+        self.envs_per_worker = envs_per_worker
+        self.render_mode = None
+        self.waiting = False
+        self.closed = False
+
+        n = n_workers * envs_per_worker
+        probe = TetrisVecEnv(1, **env_kwargs)
+        layout = {
+            key: (space.shape, space.dtype)
+            for key, space in probe.observation_space.spaces.items()
+        }
+        layout["actions"] = ((), np.int64)
+        layout["rewards"] = ((), np.float32)
+        layout["dones"] = ((), bool)
+        self.blocks, self.buffers, specs = {}, {}, {}
+        for key, (shape, dtype) in layout.items():
+            shape = (n, *shape)
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self.blocks[key] = shm
+            self.buffers[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            specs[key] = (shm.name, shape, dtype)
+
+        if start_method is None:
+            methods = mp.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        ctx = mp.get_context(start_method)
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(n_workers)])
+        self.processes = []
+        for work_remote, remote, games in zip(
+            work_remotes, self.remotes, self._slices()
+        ):
+            args = (work_remote, remote, envs_per_worker, env_kwargs, specs, games)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        super().__init__(n, probe.observation_space, probe.action_space)
+
+    def _slices(self):
+        for w in range(self.n_workers):
+            yield slice(w * self.envs_per_worker, (w + 1) * self.envs_per_worker)
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def _route(self, indices):
+        # Group global game indices into {worker: local indices}.
+        routes = {}
+        for i in self._indices(indices):
+            w, local = divmod(i, self.envs_per_worker)
+            routes.setdefault(w, []).append(local)
+        return routes
+
+    def _observation(self):
+        # Copy out of shared memory: SB3 keeps the previous observation
+        # around while the workers are already writing the next one.
+        return {key: self.buffers[key].copy() for key in self.observation_space.spaces}
+
+    def reset(self):
+        for remote, games in zip(self.remotes, self._slices()):
+            remote.send(("reset", self._seeds[games]))
+        for remote in self.remotes:
+            remote.recv()
+        self._reset_seeds()
+        self._reset_options()
+        return self._observation()
+
+    def step_async(self, actions):
+        self.buffers["actions"][:] = np.asarray(actions).reshape(self.num_envs)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        infos = [{"TimeLimit.truncated": False} for _ in range(self.num_envs)]
+        for games, remote in zip(self._slices(), self.remotes):
+            for i, info in remote.recv().items():
+                infos[games.start + i] = info
+        self.waiting = False
+        return (
+            self._observation(),
+            self.buffers["rewards"].copy(),
+            self.buffers["dones"].copy(),
+            infos,
+        )
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.buffers = None
+        for shm in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        values = {}
+        for w, local in self._route(indices).items():
+            self.remotes[w].send(("get_attr", (attr_name, local)))
+            for i, value in zip(local, self.remotes[w].recv()):
+                values[w * self.envs_per_worker + i] = value
+        return [values[i] for i in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        for w, local in self._route(indices).items():
+            self.remotes[w].send(("set_attr", (attr_name, value, local)))
+            self.remotes[w].recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """Call `TetrisVecEnv.env_method` on the workers hosting `indices`."""
+        values = {}
+        for w, local in self._route(indices).items():
+            data = (method_name, method_args, method_kwargs, local)
+            self.remotes[w].send(("env_method", data))
+            for i, value in zip(local, self.remotes[w].recv()):
+                values[w * self.envs_per_worker + i] = value
+        return [values[i] for i in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
@@ -0,0 +1,358 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from tetris import PieceStream, Tetramino
+from tetris_metrics import (
+    batch_blocked_cells,
+    batch_bumpiness,
+    batch_max_height,
+    clear_lines,
+)
+from tetris_env import (
+    COLS,
+    DOWN,
+    DROP,
+    LEFT,
+    NONE,
+    RIGHT,
+    ROTATE,
+    ROWS,
+    make_observation_space,
+)
+
+TYPES = Tetramino.TYPES
+N_ROTATIONS = np.array([len(Tetramino.FIGURES[t]) for t in TYPES])
+# (type, rotation, cell, (dy, dx)) with rotations padded to 4 by wrapping.
+OFFSETS = np.array(
+    [[Tetramino.CELLS[t][r % len(Tetramino.CELLS[t])] for r in range(4)] for t in TYPES]
+)
+LINE_BONUS = np.array([0.0, 1.0, 3.0, 5.0, 8.0])
+
+
+class TetrisVecEnv(VecEnv):
+    """N `TetrisEnv` games stepped together on stacked NumPy arrays.
+
+    Each game behaves like `TetrisEnv.step` (same actions, gravity, rewards,
+    truncation and piece sequence for a given seed), but all games advance in
+    one vectorized call and observations come back already batched. Finished
+    games are reset automatically, SB3 style.
+    """
+
+    def __init__(
+        self,
+        num_envs,
+        base_fall_interval=24,
+        max_episode_steps=None,
+        action_repeat=1,
+        skip_idle=False,
+    ):
+        self.render_mode = None
+        self.base_fall_interval = base_fall_interval
+        self.max_episode_steps = max_episode_steps
+        if action_repeat < 1:
+            raise ValueError(f"action_repeat must be at least 1, got {action_repeat}")
+        self.action_repeat = action_repeat
+        self.skip_idle = skip_idle
+        super().__init__(
+            num_envs, make_observation_space(base_fall_interval), spaces.Discrete(6)
+        )
+        n = num_envs
+        self.streams = [PieceStream() for _ in range(n)]
+        self.boards = np.zeros((n, ROWS, COLS), dtype=np.uint8)
+        self.piece = np.zeros(n, dtype=np.int64)
+        self.color = np.zeros(n, dtype=np.uint8)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.next_piece = np.zeros(n, dtype=np.int64)
+        self.next_color = np.zeros(n, dtype=np.uint8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.gameover = np.zeros(n, dtype=bool)
+
+        # Env-side bookkeeping, mirroring the attributes of TetrisEnv.
+        self.bumpiness = np.zeros(n, dtype=np.int64)
+        self.height = np.zeros(n, dtype=np.int64)
+        self.hole_count = np.zeros(n, dtype=np.int64)
+        self.seen_score = np.zeros(n, dtype=np.int64)
+        self.seen_level = np.ones(n, dtype=np.int64)
+        self.fall_interval = np.full(n, base_fall_interval, dtype=np.int64)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.next_gravity_frame = np.full(n, base_fall_interval, dtype=np.int64)
+        self.steps_until_truncated = 35
+        self.steps_without_scoring = np.zeros(n, dtype=np.int64)
+        self.actions = np.zeros(n, dtype=np.int64)
+
+        # Per-episode totals reported in info["episode"] when a game ends.
+        self.episode_return = np.zeros(n, dtype=np.float64)
+        self.episode_length = np.zeros(n, dtype=np.int64)
+        self.pieces = np.zeros(n, dtype=np.int64)
+
+    # ENGINE *****************************************************************
+
+    def _spawn(self, idx):
+        for i in idx:
+            self.piece[i], self.color[i] = self.next_piece[i], self.next_color[i]
+            self.next_piece[i], self.next_color[i] = self.streams[i].draw()
+        self.rotation[idx] = 0
+        self.x[idx] = 5
+        self.y[idx] = 0
+
+    def _cells(self, idx, x, y, rotation):
+        cells = OFFSETS[self.piece[idx], rotation]
+        return y[:, None] + cells[..., 0], x[:, None] + cells[..., 1]
+
+    def _collides(self, idx, x, y, rotation):
+        rows, cols = self._cells(idx, x, y, rotation)
+        outside = (rows > ROWS - 1) | (cols < 0) | (cols > COLS - 1)
+        # Negative rows wrap around like Python list indexing does in Tetris.
+        hit = self.boards[idx[:, None], rows % ROWS, cols % COLS] > 0
+        return (outside | hit).any(axis=1)
+
+    def _go_down(self, idx):
+        """Move pieces in `idx` down one row; return the mask of locked ones."""
+        blocked = self._collides(idx, self.x[idx], self.y[idx] + 1, self.rotation[idx])
+        self.y[idx[~blocked]] += 1
+        self._freeze(idx[blocked])
+        return blocked
+
+    def _hard_drop(self, idx):
+        rows, cols = self._cells(idx, self.x[idx], self.y[idx], self.rotation[idx])
+        filled = self.boards[idx[:, None], :, cols] > 0
+        below = filled & (np.arange(ROWS) > rows[..., None])
+        first = np.where(below.any(axis=2), below.argmax(axis=2), ROWS)
+        self.y[idx] += (first - rows - 1).min(axis=1)
+        self._freeze(idx)
+
+    def _freeze(self, idx):
+        if not idx.size:
+            return
+        rows, cols = self._cells(idx, self.x[idx], self.y[idx], self.rotation[idx])
+        self.boards[idx[:, None], rows, cols] = self.color[idx, None]
+        self.pieces[idx] += 1
+
+        boards, n_cleared = clear_lines(self.boards[idx])
+        hit = n_cleared > 0
+        if hit.any():
+            self.boards[idx[hit]] = boards[hit]
+            old_score = self.score[idx[hit]]
+            self.score[idx[hit]] += n_cleared[hit]
+            self.level[idx[hit]] += self.score[idx[hit]] // 10 - old_score // 10
+
+        self._spawn(idx)
+        self.gameover[idx] = self._collides(
+            idx, self.x[idx], self.y[idx], self.rotation[idx]
+        )
+
+    # VECENV API *************************************************************
+
+    def _reset_games(self, idx):
+        for i in idx:
+            self.boards[i] = 0
+            self.score[i] = 0
+            self.level[i] = 1
+            self.gameover[i] = False
+            self.next_piece[i], self.next_color[i] = self.streams[i].draw()
+        self._spawn(idx)
+        self.bumpiness[idx] = 0
+        self.height[idx] = 0
+        self.hole_count[idx] = 0
+        self.seen_score[idx] = 0
+        self.seen_level[idx] = 1
+        self.fall_interval[idx] = self.base_fall_interval
+        self.frame[idx] = 0
+        self.next_gravity_frame[idx] = self.base_fall_interval
+        self.steps_without_scoring[idx] = 0
+        self.episode_return[idx] = 0
+        self.episode_length[idx] = 0
+        self.pieces[idx] = 0
+
+    def _get_observation(self):
+        n = self.num_envs
+        arange = np.arange(n)
+        piece_type = np.zeros((n, 7), dtype=np.float32)
+        piece_type[arange, self.piece] = 1
+        rotation = np.zeros((n, 4), dtype=np.float32)
+        rotation[arange, self.rotation] = 1
+        next_piece = np.zeros((n, 7), dtype=np.float32)
+        next_piece[arange, self.next_piece] = 1
+        ticks = np.clip(
+            self.next_gravity_frame - self.frame, 0, self.base_fall_interval
+        )
+        return {
+            "piece_type": piece_type,
+            "rotation": rotation,
+            "x": self.x[:, None].astype(np.float32),
+            "y": self.y[:, None].astype(np.float32),
+            "ticks_to_gravity": ticks[:, None].astype(np.float32),
+            "next_piece": next_piece,
+            "hold_piece": np.zeros((n, 7), dtype=np.float32),
+            "level": self.level[:, None].astype(np.float32),
+            "board": (self.boards != 0).reshape(n, -1).astype(np.float32),
+        }
+
+    def reset(self):
+        for i, seed in enumerate(self._seeds):
+            if seed is not None:
+                self.streams[i] = PieceStream(seed)
+        self._reset_games(np.arange(self.num_envs))
+        self._reset_seeds()
+        self._reset_options()
+        return self._get_observation()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions).reshape(self.num_envs)
+
+    def _advance(self, idx, actions):
+        """Play one frame of `actions` for the games in `idx`.
+
+        Returns which of them locked their piece by a drop or by gravity.
+        """
+        freezed = np.zeros(idx.size, dtype=bool)
+
+        for action, dx in ((LEFT, -1), (RIGHT, 1)):
+            sub = idx[actions == action]
+            moved = ~self._collides(
+                sub, self.x[sub] + dx, self.y[sub], self.rotation[sub]
+            )
+            self.x[sub[moved]] += dx
+
+        # A DOWN that locks the piece is not reported as a lock, as in TetrisEnv.
+        self._go_down(idx[actions == DOWN])
+
+        sub = idx[actions == ROTATE]
+        rotation = (self.rotation[sub] + 1) % N_ROTATIONS[self.piece[sub]]
+        rotated = ~self._collides(sub, self.x[sub], self.y[sub], rotation)
+        self.rotation[sub[rotated]] = rotation[rotated]
+
+        drop = actions == DROP
+        self._hard_drop(idx[drop])
+        freezed[drop] = True
+
+        if self.skip_idle:
+            sub = idx[actions == NONE]
+            self.frame[sub] = np.maximum(self.frame[sub], self.next_gravity_frame[sub])
+
+        fall = np.flatnonzero(
+            ~freezed & (self.frame[idx] >= self.next_gravity_frame[idx])
+        )
+        sub = idx[fall]
+        freezed[fall] = self._go_down(sub)
+        self.next_gravity_frame[sub] += self.fall_interval[sub]
+        self.frame[idx] += 1
+        return freezed
+
+    def step_wait(self):
+        actions = self.actions
+        n = self.num_envs
+        freezed = np.zeros(n, dtype=bool)
+
+        # Each game repeats its action for up to `action_repeat` frames and
+        # stops early once a piece locks or the game ends, like TetrisEnv.
+        active = np.arange(n)
+        pieces = self.pieces.copy()
+        for repeat in range(self.action_repeat):
+            if repeat:
+                keep = ~freezed[active] & ~self.gameover[active]
+                keep &= self.pieces[active] == pieces[active]
+                active = active[keep]
+                if not active.size:
+                    break
+            freezed[active] = self._advance(active, actions[active])
+
+        rewards = np.zeros(n, dtype=np.float64)
+        idx = np.flatnonzero(freezed)
+        if idx.size:
+            self.seen_level[idx] = self.level[idx]
+            boards = self.boards[idx]
+            bumpiness = batch_bumpiness(boards)
+            height = batch_max_height(boards)
+            hole_count = batch_blocked_cells(boards)
+            lines = np.minimum(self.score[idx] - self.seen_score[idx], 4)
+            line_bonus = LINE_BONUS[lines]
+            self.steps_without_scoring[idx] = np.where(
+                line_bonus != 0.0, 0, self.steps_without_scoring[idx] + 1
+            )
+            rewards[idx] = (
+                line_bonus
+                - 0.2 * (bumpiness - self.bumpiness[idx])
+                - 1.0 * (hole_count - self.hole_count[idx])
+                - 0.5 * (height - self.height[idx])
+            )
+            self.bumpiness[idx] = bumpiness
+            self.height[idx] = height
+            self.hole_count[idx] = hole_count
+            self.seen_score[idx] = self.score[idx]
+
+        terminated = self.gameover.copy()
+        truncated = self.steps_without_scoring >= self.steps_until_truncated
+        rewards[terminated] -= 5
+        rewards = np.clip(rewards, -20.0, 20.0).astype(np.float32)
+        self.episode_return += rewards
+        self.episode_length += 1
+        if self.max_episode_steps is not None:
+            truncated |= self.episode_length >= self.max_episode_steps
+
+        level_up = freezed & (self.seen_level <= 5)
+        self.fall_interval[level_up] = self.base_fall_interval - 4 * (
+            self.seen_level[level_up] - 1
+        )
+
+        dones = terminated | truncated
+        infos = [
+            {"TimeLimit.truncated": bool(truncated[i] and not terminated[i])}
+            for i in range(n)
+        ]
+        idx = np.flatnonzero(dones)
+        if idx.size:
+            obs = self._get_observation()
+            for i in idx:
+                infos[i]["terminal_observation"] = {k: v[i] for k, v in obs.items()}
+                infos[i]["episode"] = {
+                    "r": float(self.episode_return[i]),
+                    "l": int(self.episode_length[i]),
+                    "lines": int(self.score[i]),
+                    "pieces": int(self.pieces[i]),
+                }
+            self._reset_games(idx)
+        return self._get_observation(), rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def _per_game(self, value, indices):
+        # Batched arrays hold one entry per game; anything else is shared.
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in self._indices(indices)]
+        return [value for _ in self._indices(indices)]
+
+    def get_attr(self, attr_name, indices=None):
+        return self._per_game(getattr(self, attr_name), indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        current = getattr(self, attr_name, None)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[list(self._indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """Call a method of this env once and return its result per game.
+
+        The games share one object, so the method runs a single time; like
+        `get_attr`, a result with one row per game is split across `indices`
+        and any other result is repeated for each of them.
+        """
+        method = getattr(self, method_name)
+        return self._per_game(method(*method_args, **method_kwargs), indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
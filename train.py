@@ -1,30 +1,135 @@
-from stable_baselines3 import PPO
-from tetris_env import TetrisEnv
+import argparse
+import os
 from pathlib import Path
 
+import torch
+from stable_baselines3 import PPO
+
+from actor_learner import ActorLearner
+from checkpoints import CheckpointSaver, latest_checkpoint
+from tetris_subproc_env import SubprocTetrisVecEnv
+from tetris_vec_env import TetrisVecEnv
+
 models_dir = Path("models") / "PPO"
 logs_dir = Path("logs")
 
-models_dir.mkdir(parents=True, exist_ok=True)
-logs_dir.mkdir(parents=True, exist_ok=True)
-
-env = TetrisEnv()
-
-latest_checkpoint = None
-latest_timestep = 0
-checkpoints = sorted(models_dir.glob("*.zip"), key=lambda p: int(p.stem), reverse=True)
-if checkpoints:
-    latest_checkpoint = checkpoints[0]
-    latest_timestep = int(latest_checkpoint.stem)
-
-if latest_checkpoint:
-    print(f"Loading existing model from {latest_checkpoint}")
-    model = PPO.load(str(latest_checkpoint), env=env, tensorboard_log=str(logs_dir))
-else:
-    model = PPO("MultiInputPolicy", env, verbose=1, tensorboard_log=str(logs_dir))
-
-TIMESTEPS = 10_000
-start_iteration = latest_timestep // TIMESTEPS
-for i in range(start_iteration, start_iteration + 100):
-    model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False, tb_log_name="PPO")
-    model.save(str(models_dir / f"{TIMESTEPS * (i + 1)}"))
+
+def make_env(workers, envs_per_worker, **env_kwargs):
+    # A single worker gains nothing from a subprocess, so step it in place.
+    if workers <= 1:
+        return TetrisVecEnv(envs_per_worker, **env_kwargs)
+    return SubprocTetrisVecEnv(workers, envs_per_worker, **env_kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a PPO agent on Tetris.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--envs-per-worker", type=int, default=8)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--n-steps", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--total-timesteps", type=int, default=1_000_000)
+    parser.add_argument("--save-every", type=int, default=10_000)
+    parser.add_argument("--keep-last", type=int, default=5)
+    parser.add_argument("--keep-best", type=int, default=1)
+    parser.add_argument(
+        "--eval-episodes",
+        type=int,
+        default=0,
+        help="score each checkpoint on this many episodes (for --keep-best)",
+    )
+    parser.add_argument("--action-repeat", type=int, default=1)
+    parser.add_argument(
+        "--skip-idle",
+        action="store_true",
+        help="NONE jumps straight to the next gravity tick",
+    )
+    parser.add_argument(
+        "--actor-learner",
+        action="store_true",
+        help="train with asynchronous actors and V-trace instead of PPO rollouts",
+    )
+    parser.add_argument("--unroll", type=int, default=32)
+    parser.add_argument("--max-staleness", type=int, default=8)
+    args = parser.parse_args()
+
+    models_dir.mkdir(parents=True, exist_ok=True)
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    torch.set_num_threads(args.torch_threads)
+
+    env_kwargs = {"action_repeat": args.action_repeat, "skip_idle": args.skip_idle}
+    if args.actor_learner:
+        # Only provides the spaces: the actors run their own games.
+        env = TetrisVecEnv(1, **env_kwargs)
+    else:
+        env = make_env(args.workers, args.envs_per_worker, **env_kwargs)
+
+    checkpoint = latest_checkpoint(models_dir)
+    if checkpoint:
+        print(f"Loading existing model from {checkpoint}")
+        model = PPO.load(
+            str(checkpoint),
+            env=env,
+            tensorboard_log=str(logs_dir),
+            n_steps=args.n_steps,
+            batch_size=args.batch_size,
+        )
+    else:
+        model = PPO(
+            "MultiInputPolicy",
+            env,
+            n_steps=args.n_steps,
+            batch_size=args.batch_size,
+            verbose=1,
+            tensorboard_log=str(logs_dir),
+        )
+
+    saver = CheckpointSaver(models_dir, args.keep_last, args.keep_best)
+    eval_env = None
+    if args.eval_episodes:
+        # Imported here: evaluate imports this module.
+        from evaluate import run_episodes
+
+        eval_env = TetrisVecEnv(
+            min(args.eval_episodes, 32), max_episode_steps=20_000, **env_kwargs
+        )
+
+    def save():
+        score = None
+        if eval_env is not None:
+            episodes, _ = run_episodes(model, eval_env, args.eval_episodes)
+            score = sum(episode["lines"] for episode in episodes) / len(episodes)
+        saver.save(model, model.num_timesteps, score)
+
+    learner = None
+    try:
+        if args.actor_learner:
+            learner = ActorLearner(
+                model,
+                args.workers,
+                args.envs_per_worker,
+                args.unroll,
+                max_staleness=args.max_staleness,
+                **env_kwargs,
+            )
+            learner.learn(args.total_timesteps, save, args.save_every)
+            save()
+        else:
+            while model.num_timesteps < args.total_timesteps:
+                model.learn(
+                    total_timesteps=args.save_every,
+                    reset_num_timesteps=False,
+                    tb_log_name="PPO",
+                )
+                save()
+    finally:
+        if learner is not None:
+            learner.close()
+        saver.close()
+        env.close()
+        if eval_env is not None:
+            eval_env.close()
+
+
+if __name__ == "__main__":
+    main()
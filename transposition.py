@@ -0,0 +1,76 @@
+import sys
+from collections import OrderedDict
+
+# Rough cost of an entry beyond its value: the dict slot, the key tuple and
+# the bookkeeping pair.
+ENTRY_OVERHEAD = 200
+
+
+def sizeof(value):
+    """Approximate the bytes held by `value`, one container level deep."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class TranspositionCache:
+    """Bounded LRU cache for results computed on game positions.
+
+    Entries are grouped by kind ("placements", "value", ...) and keyed by a
+    tuple that starts with a `Tetris.board_hash`, so different move orders
+    that reach the same position share one entry. The least recently used
+    entries are evicted once the estimated size of all entries exceeds
+    `memory_budget` bytes. Hits and misses are counted per kind.
+    """
+
+    def __init__(self, memory_budget=64 * 2**20):
+        self.memory_budget = memory_budget
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, kind, key):
+        """Return the cached value, or None when it is not cached."""
+        entry = self.entries.get((kind, key))
+        if entry is None:
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return None
+        self.entries.move_to_end((kind, key))
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        return entry[0]
+
+    def put(self, kind, key, value):
+        entries = self.entries
+        old = entries.pop((kind, key), None)
+        if old is not None:
+            self.bytes -= old[1]
+        size = sizeof(value) + ENTRY_OVERHEAD
+        entries[kind, key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.memory_budget and entries:
+            _, (_, size) = entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        """Return the size of the cache and the hit rate of each kind."""
+        stats = {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "evictions": self.evictions,
+        }
+        for kind in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits.get(kind, 0), self.misses.get(kind, 0)
+            stats[kind] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses),
+            }
+        return stats
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0